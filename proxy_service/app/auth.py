@@ -1,22 +1,53 @@
+import time
+import asyncio
+import hashlib
+import hmac
 from datetime import datetime, timedelta
 from typing import Optional
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from app.config import SECRET_KEY, ALGORITHM, ADMIN_USERNAME, ADMIN_PASSWORD_HASH
-
-# Password Hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+import bcrypt
+from app.config import SECRET_KEY, ALGORITHM, ADMIN_USERNAME, ADMIN_PASSWORD_HASH, BCRYPT_ROUNDS
 
 # OAuth2 Scheme (Standard API Header check)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+# Verified JWT payloads keyed by token digest -> (payload, exp timestamp).
+# Short TTL so a token is re-verified at least every few seconds.
+_token_cache = TTLCache(maxsize=10000, ttl=5)
+
+# Successful bcrypt checks keyed by HMAC(SECRET_KEY, password + hash).
+# Failures are never cached.
+_verified_cache = TTLCache(maxsize=1024, ttl=60)
+
+def _checkpw(plain_password, hashed_password):
+    try:
+        return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    except ValueError:
+        # Malformed stored hash
+        return False
+
+async def verify_password(plain_password, hashed_password):
+    key = hmac.new(
+        SECRET_KEY.encode(),
+        plain_password.encode() + b"\0" + hashed_password.encode(),
+        "sha256"
+    ).digest()
+    if key in _verified_cache:
+        return True
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+    # bcrypt is pure CPU for ~100s of ms; keep it off the event loop
+    ok = await asyncio.to_thread(_checkpw, plain_password, hashed_password)
+    if ok:
+        _verified_cache[key] = True
+    return ok
+
+async def get_password_hash(password):
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    hashed = await asyncio.to_thread(bcrypt.hashpw, password.encode(), salt)
+    return hashed.decode()
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -27,20 +58,43 @@ def create_access_token(data: dict):
 
 from app.database import get_stored_password_hash
 
+# In-process copy of the DB password hash: (hash, monotonic timestamp)
+ACTIVE_HASH_TTL = 60
+_active_hash_cache = None
+_active_hash_lock = asyncio.Lock()
+
 # --- HELPER: Get Active Password Hash ---
 async def get_active_password_hash():
     """
     Returns the active password hash.
     Priority:
     1. Environment Variable (config.ADMIN_PASSWORD_HASH)
-    2. Database (settings_collection)
+    2. Database (settings_collection), memoized for ACTIVE_HASH_TTL seconds
     """
+    global _active_hash_cache
     if ADMIN_PASSWORD_HASH:
         return ADMIN_PASSWORD_HASH
-    
-    # Check DB
-    db_hash = await get_stored_password_hash()
-    return db_hash
+
+    cached = _active_hash_cache
+    if cached and time.monotonic() - cached[1] < ACTIVE_HASH_TTL:
+        return cached[0]
+
+    async with _active_hash_lock:
+        cached = _active_hash_cache
+        if cached and time.monotonic() - cached[1] < ACTIVE_HASH_TTL:
+            return cached[0]
+
+        # Check DB
+        db_hash = await get_stored_password_hash()
+        # Never memoize "not initialized" so a finished setup is seen everywhere
+        _active_hash_cache = (db_hash, time.monotonic()) if db_hash else None
+        return db_hash
+
+async def invalidate_active_password_hash():
+    """Drops the memoized hash so the next request re-reads the database."""
+    global _active_hash_cache
+    async with _active_hash_lock:
+        _active_hash_cache = None
 
 # --- DEPENDENCY: Check Auth (Cookie OR Header) ---
 async def get_current_user(request: Request):
@@ -76,12 +130,34 @@ async def get_current_user(request: Request):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    payload = _decode_token(token)
+    username: str = payload["sub"]
+    if username != ADMIN_USERNAME:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    
+    return username
+
+def _decode_token(token: str) -> dict:
+    """
+    Verifies a JWT, reusing a recently verified payload for the same token.
+    Only successful decodes are cached.
+    """
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    entry = _token_cache.get(key)
+    if entry:
+        payload, exp = entry
+        if time.time() < exp:
+            return payload
+        _token_cache.pop(key, None)
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None or username != ADMIN_USERNAME:
-            raise HTTPException(status_code=401, detail="Invalid credentials")
+        # exp/sub are enforced by the decode itself
+        payload = jwt.decode(
+            token, SECRET_KEY, algorithms=[ALGORITHM],
+            options={"require_exp": True, "require_sub": True, "verify_exp": True}
+        )
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
-    
-    return username
\ No newline at end of file
+
+    _token_cache[key] = (payload, float(payload["exp"]))
+    return payload
\ No newline at end of file
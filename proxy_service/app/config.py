@@ -1,5 +1,7 @@
 import os
-from passlib.context import CryptContext
+import logging
+
+logger = logging.getLogger(__name__)
 
 # --- SECURITY CONFIG ---
 SECRET_KEY = os.getenv("SECRET_KEY", "change_this_to_a_random_string_in_production")
@@ -8,8 +10,8 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7 # 7 Days
 
 # --- ADMIN CREDENTIALS ---
 ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 
-# 1. Check for Env Var Hash
 # 1. Check for Env Var Hash
 _env_hash = os.getenv("ADMIN_PASSWORD_HASH")
 
@@ -20,9 +22,10 @@ else:
     # 2. Check for Plaintext Password in Env
     _env_pass = os.getenv("ADMIN_PASSWORD")
     if _env_pass:
-        print("🔐 using provided ADMIN_PASSWORD from environment...")
-        pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        ADMIN_PASSWORD_HASH = pwd_context.hash(_env_pass)
+        import bcrypt # Only needed on this path
+        logger.info("🔐 using provided ADMIN_PASSWORD from environment...")
+        ADMIN_PASSWORD_HASH = bcrypt.hashpw(_env_pass.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+        logger.warning(f"⚠️ Persist this with ADMIN_PASSWORD_HASH={ADMIN_PASSWORD_HASH} to skip bcrypt on next startup")
     else:
         # 3. No Config in Env - System might need Setup
         ADMIN_PASSWORD_HASH = None
@@ -1,17 +1,22 @@
 import os
-import json
+import orjson
+import time
+import asyncio
 import datetime
 import uuid
 import hashlib
+import logging
 import httpx
 from motor.motor_asyncio import AsyncIOMotorClient
-import redis.asyncio as redis
 from bson.objectid import ObjectId
-from pymongo import ASCENDING, DESCENDING
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+from app.redis_pool import get_redis
+
+logger = logging.getLogger(__name__)
 
 # --- CONFIGURATION ---
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 
 # --- DATABASE CLIENTS ---
 mongo_client = AsyncIOMotorClient(MONGO_URL)
@@ -28,28 +33,52 @@ provider_stats_collection = db.provider_stats
 unified_catalog_collection = db.unified_catalog
 
 # Redis
-redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+redis_client = get_redis()
 CACHE_TTL = 86400 # 24 Hours
+CACHE_INDEX_KEY = "cache:expiry"  # ZSET of keys written by set_cache, scored by expiry timestamp
+LIBRARY_TOTAL_KEY = "books:total"
+LIBRARY_TOTAL_TTL = 60
+BOOK_STATS_PREFIX = "book_stats:"  # HASH per ASIN: access_count (pending hits), last_accessed; drained by flush_access_stats
 
 # --- INITIALIZATION ---
 async def init_db_indexes():
-    """Creates indexes for performance on startup."""
-    await books_collection.create_index([("asin", ASCENDING)], unique=True)
-    await books_collection.create_index([("title", ASCENDING)])
-    await books_collection.create_index([("authors", ASCENDING)])
-    await books_collection.create_index([("added_at", DESCENDING)])
-    await books_collection.create_index([("last_accessed", DESCENDING)])
+    """Creates indexes for performance on startup (one batch per collection)."""
+    await asyncio.gather(
+        books_collection.create_indexes([
+            IndexModel([("asin", ASCENDING)], unique=True),
+            IndexModel([("title", ASCENDING)]),
+            IndexModel([("authors", ASCENDING)]),
+            IndexModel([("added_at", DESCENDING)]),
+            IndexModel([("last_accessed", DESCENDING)]),
+            # Library filters
+            IndexModel([("provider", ASCENDING), ("rating", DESCENDING)]),
+            IndexModel([("language", ASCENDING)]),
+            IndexModel([("published_date", ASCENDING)]),
+        ]),
+        logs_collection.create_indexes([
+            IndexModel([("timestamp", DESCENDING)]),
+            IndexModel([("device_id", ASCENDING)]),
+            IndexModel([("action", ASCENDING), ("target", ASCENDING)]),
+        ]),
+        provider_stats_collection.create_indexes([
+            IndexModel([("timestamp", DESCENDING)]),
+            IndexModel([("provider", ASCENDING)]),
+        ]),
+        custom_fields_collection.create_indexes([
+            IndexModel([("asin", ASCENDING)]),
+        ]),
+        unified_catalog_collection.create_indexes([
+            IndexModel([("relations.provider", ASCENDING), ("relations.id", ASCENDING)]),
+        ]),
+    )
 
 # --- CORE LIBRARY LOGIC (MONGODB) ---
 
-async def upsert_book_to_db(book_data: dict):
+def _book_upsert(book_data: dict, now: datetime.datetime):
     """
-    Saves book to MongoDB. Removes conflicting fields to prevent Code 40 errors.
+    Builds the (filter, update) upsert pair for a book.
+    Removes conflicting fields to prevent Code 40 errors.
     """
-    if not book_data or "asin" not in book_data: return
-
-    now = datetime.datetime.utcnow()
-    
     # Prepare update data
     update_data = book_data.copy()
     # Remove fields that should NOT be overwritten on update
@@ -58,18 +87,99 @@ async def upsert_book_to_db(book_data: dict):
     
     update_data["updated_at"] = now
 
-    await books_collection.update_one(
+    return (
         {"asin": book_data["asin"]},
         {
             "$set": update_data,
             "$setOnInsert": {"added_at": now, "access_count": 1}
-        },
-        upsert=True
+        }
     )
 
+async def upsert_book_to_db(book_data: dict):
+    """
+    Saves book to MongoDB.
+    """
+    if not book_data or "asin" not in book_data: return
+
+    query, update = _book_upsert(book_data, datetime.datetime.now(datetime.timezone.utc))
+    result = await books_collection.update_one(query, update, upsert=True)
+    # New book -> cached library total is stale
+    if result.upserted_id is not None:
+        await redis_client.delete(LIBRARY_TOTAL_KEY)
+
+async def bulk_upsert_books(books: list):
+    """
+    Saves many books in one unordered bulk_write.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    ops = [UpdateOne(*_book_upsert(b, now), upsert=True) for b in books if b and "asin" in b]
+    if not ops: return
+
+    result = await books_collection.bulk_write(ops, ordered=False)
+    if result.upserted_count:
+        await redis_client.delete(LIBRARY_TOTAL_KEY)
+
 async def get_book_from_db(asin: str):
     return await books_collection.find_one({"asin": asin}, {"_id": 0})
 
+async def get_books_from_db_many(asins: list, fields: tuple = None):
+    """One $in query for many ASINs -> {asin: book} for those stored; `fields` limits what's returned."""
+    if not asins: return {}
+    projection = {"_id": 0, "asin": 1, **dict.fromkeys(fields, 1)} if fields else {"_id": 0}
+    cursor = books_collection.find({"asin": {"$in": asins}}, projection)
+    return {book["asin"]: book async for book in cursor}
+
+async def get_stored_asins(asins: list):
+    """Which of these ASINs are in the library - one index-only distinct()."""
+    if not asins: return set()
+    return set(await books_collection.distinct("asin", {"asin": {"$in": asins}}))
+
+def _join_expr(field: str):
+    """Aggregation equivalent of ", ".join(doc.get(field, []))."""
+    return {"$reduce": {
+        "input": {"$ifNull": [f"${field}", []]},
+        "initialValue": "",
+        "in": {"$cond": [{"$eq": ["$$value", ""]}, "$$this", {"$concat": ["$$value", ", ", "$$this"]}]}
+    }}
+
+# Display-ready strings for the library table, computed by Mongo
+LIBRARY_DISPLAY_FIELDS = {
+    "authors_str": _join_expr("authors"),
+    "narrators_str": _join_expr("narrators"),
+    "genres_str": _join_expr("genres"),
+    "series_str": {"$cond": [
+        {"$gt": [{"$size": {"$ifNull": ["$series", []]}}, 0]},
+        {"$let": {
+            "vars": {"s": {"$arrayElemAt": ["$series", 0]}},
+            "in": {"$concat": [
+                {"$ifNull": [{"$toString": "$$s.name"}, ""]}, " #",
+                {"$ifNull": [{"$toString": "$$s.sequence"}, ""]}
+            ]}
+        }},
+        "-"
+    ]},
+    "cached_at": {"$cond": [
+        {"$eq": [{"$type": "$added_at"}, "date"]},
+        {"$dateToString": {"format": "%Y-%m-%d", "date": "$added_at"}},
+        {"$substrCP": [{"$ifNull": [{"$toString": "$added_at"}, ""]}, 0, 10]}
+    ]},
+    "last_accessed": {"$cond": [
+        {"$eq": [{"$type": "$last_accessed"}, "date"]},
+        {"$dateToString": {"format": "%Y-%m-%d %H:%M", "date": "$last_accessed"}},
+        "$last_accessed"
+    ]}
+}
+
+# Only what the library table renders; descriptions, chapters etc. stay in Mongo
+LIBRARY_LIST_PROJECTION = {
+    "_id": 0,
+    **{f: 1 for f in (
+        "asin", "title", "cover_image", "provider", "rating", "rating_count",
+        "runtime_minutes", "publisher", "published_date", "language", "access_count"
+    )},
+    **LIBRARY_DISPLAY_FIELDS
+}
+
 async def get_library_page(page: int = 1, limit: int = 50, sort_by: str = "added_at", order: int = -1, filters: dict = None):
     """
     Paginated fetch with filtering.
@@ -84,37 +194,44 @@ async def get_library_page(page: int = 1, limit: int = 50, sort_by: str = "added
             query["provider"] = filters["provider"]
         if filters.get("language"):
             query["language"] = filters["language"].lower()
-        if filters.get("year"):
-            query["published_date"] = {"$regex": f"^{filters['year']}"}
+        year = str(filters.get("year") or "").strip()
+        if year.isdigit():
+            # Range on the string date (index seek); also matches bare "YYYY" values
+            query["published_date"] = {"$gte": year, "$lt": str(int(year) + 1)}
+
+    rows_pipeline = [
+        {"$sort": {sort_by: order}},
+        {"$skip": skip},
+        {"$limit": limit},
+        # Trim to the table columns and format for UI
+        {"$project": LIBRARY_LIST_PROJECTION}
+    ]
 
-    cursor = books_collection.find(query, {"_id": 0})
-    cursor.sort(sort_by, order).skip(skip).limit(limit)
-    books = await cursor.to_list(length=limit)
-    total_count = await books_collection.count_documents(query)
-    
-    # Format for UI
-    formatted = []
-    for data in books:
-        data['authors_str'] = ", ".join(data.get("authors", []))
-        data['narrators_str'] = ", ".join(data.get("narrators", []))
-        data['genres_str'] = ", ".join(data.get("genres", []))
-        s = data.get("series", [])
-        data['series_str'] = f"{s[0].get('name')} #{s[0].get('sequence')}" if s else "-"
-        
-        added = data.get("added_at")
-        if isinstance(added, datetime.datetime): data['cached_at'] = added.strftime("%Y-%m-%d")
-        else: data['cached_at'] = str(added)[:10]
-
-        accessed = data.get("last_accessed")
-        if isinstance(accessed, datetime.datetime): data['last_accessed'] = accessed.strftime("%Y-%m-%d %H:%M")
-        
-        formatted.append(data)
-        
-    return formatted, total_count
+    # Top-level $match/$sort/$skip/$limit so the page is an index walk (a
+    # $facet sub-pipeline can't use indexes); the count runs alongside
+    books, total_count = await asyncio.gather(
+        books_collection.aggregate([{"$match": query}, *rows_pipeline] if query else rows_pipeline).to_list(length=limit),
+        books_collection.count_documents(query) if query else get_library_total()
+    )
+
+    return books, total_count
+
+async def get_library_total():
+    """Unfiltered library size, cached in Redis for LIBRARY_TOTAL_TTL seconds."""
+    cached = await redis_client.get(LIBRARY_TOTAL_KEY)
+    if cached is not None:
+        return int(cached)
+
+    total = await books_collection.count_documents({})
+    await redis_client.set(LIBRARY_TOTAL_KEY, total, ex=LIBRARY_TOTAL_TTL)
+    return total
 
 async def delete_book_from_library(asin: str):
     await books_collection.delete_one({"asin": asin})
-    await redis_client.delete(f"book_v7:{asin}")
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.delete(f"book_v7:{asin}", LIBRARY_TOTAL_KEY)
+        pipe.zrem(CACHE_INDEX_KEY, f"book_v7:{asin}")
+        await pipe.execute()
 
 async def search_library_books(query: str, limit: int = 10):
     """
@@ -142,37 +259,175 @@ async def search_library_books(query: str, limit: int = 10):
 
 async def get_cache(key: str):
     data = await redis_client.get(key)
-    return json.loads(data) if data else None
+    return orjson.loads(data) if data else None
+
+async def get_cache_multi(keys: list):
+    """One MGET for many keys -> {key: data or None}."""
+    if not keys: return {}
+    values = await redis_client.mget(keys)
+    return {key: orjson.loads(val) if val else None for key, val in zip(keys, values)}
+
+async def get_cached_book(asin: str, key: str, flag_key: str):
+    """
+    get_cache(key), EXISTS flag_key and the ASIN's pending (not yet flushed)
+    hit count in one pipelined round trip -> (data, bool, int).
+    """
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.get(key)
+        pipe.exists(flag_key)
+        pipe.hget(f"{BOOK_STATS_PREFIX}{asin}", "access_count")
+        data, flag, pending = await pipe.execute()
+    return (orjson.loads(data) if data else None), bool(flag), int(pending or 0)
+
+async def wait_for_cache(key: str, lock_key: str, timeout: float, poll: float = 0.05):
+    """
+    Polls `key` while another worker holds `lock_key`. Returns the cached data,
+    or None as soon as the lock is released without a write (or after `timeout`).
+    """
+    for _ in range(int(timeout / poll)):
+        await asyncio.sleep(poll)
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.exists(lock_key)
+            data, locked = await pipe.execute()
+        if data: return orjson.loads(data)
+        if not locked: return None
+    return None
 
 async def set_cache(key: str, data: dict, expire: int = CACHE_TTL):
-    def json_serial(obj):
-        if isinstance(obj, (datetime.datetime, datetime.date)): return obj.isoformat()
-        raise TypeError(f"Type {type(obj)} not serializable")
-    await redis_client.set(key, json.dumps(data, default=json_serial), ex=expire)
+    # orjson writes datetimes as ISO strings, matching the old json_serial output
+    now = time.time()
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.set(key, orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS), ex=expire)
+        pipe.zadd(CACHE_INDEX_KEY, {key: now + expire})
+        # Index members don't expire with their keys: drop the ones already past TTL
+        pipe.zremrangebyscore(CACHE_INDEX_KEY, "-inf", now)
+        await pipe.execute()
+
+async def set_cache_many(items: dict, expire: int = CACHE_TTL):
+    """set_cache for many {key: data} pairs in one pipelined round trip."""
+    if not items: return
+    now = time.time()
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for key, data in items.items():
+            pipe.set(key, orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS), ex=expire)
+        pipe.zadd(CACHE_INDEX_KEY, dict.fromkeys(items, now + expire))
+        pipe.zremrangebyscore(CACHE_INDEX_KEY, "-inf", now)
+        await pipe.execute()
+
+async def bump_access_stats(asin: str, accessed_at: str):
+    """Records a cache-served read in the ASIN's stats hash (the cached book is left as is)."""
+    key = f"{BOOK_STATS_PREFIX}{asin}"
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hincrby(key, "access_count", 1)
+        pipe.hset(key, "last_accessed", accessed_at)
+        await pipe.execute()
+
+async def apply_access_stats(asin: str, book: dict):
+    """Adds the pending hits from the ASIN's stats hash onto a stored book."""
+    stats = await redis_client.hgetall(f"{BOOK_STATS_PREFIX}{asin}")
+    if stats:
+        book["access_count"] = book.get("access_count", 0) + int(stats.get("access_count", 0))
+        book["last_accessed"] = stats.get("last_accessed", book.get("last_accessed"))
+    return book
+
+ACCESS_STATS_FLUSH_INTERVAL = 60 # Seconds
+
+async def flush_access_stats():
+    """Drains the pending stats hashes into the library with one bulk_write."""
+    keys = [key async for key in redis_client.scan_iter(match=f"{BOOK_STATS_PREFIX}*", count=500)]
+    if not keys: return
+
+    # Read + delete in one MULTI: hits landing meanwhile start a fresh hash,
+    # so nothing is lost or counted twice (also across workers)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        for key in keys:
+            pipe.hgetall(key)
+            pipe.delete(key)
+        results = await pipe.execute()
+
+    ops = []
+    drained = {}
+    for key, stats in zip(keys, results[::2]):
+        if not stats: continue
+        asin = key[len(BOOK_STATS_PREFIX):]
+        drained[asin] = stats
+        update = {"$inc": {"access_count": int(stats.get("access_count", 0))}}
+        if "last_accessed" in stats: update["$set"] = {"last_accessed": stats["last_accessed"]}
+        ops.append(UpdateOne({"asin": asin}, update))
+    if ops:
+        await books_collection.bulk_write(ops, ordered=False)
+        await _fold_stats_into_cache(drained)
+
+async def _fold_stats_into_cache(drained: dict):
+    """
+    Adds flushed hits onto the cached books too: cache hits report the cached
+    count plus the pending hash, so the drained part has to move into the copy.
+    """
+    keys = [f"book_v7:{asin}" for asin in drained]
+    cached = await redis_client.mget(keys)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for key, val, stats in zip(keys, cached, drained.values()):
+            if not val: continue
+            book = orjson.loads(val)
+            book["access_count"] = book.get("access_count", 0) + int(stats.get("access_count", 0))
+            book["last_accessed"] = stats.get("last_accessed", book.get("last_accessed"))
+            pipe.set(key, orjson.dumps(book, option=orjson.OPT_NON_STR_KEYS), keepttl=True)
+        await pipe.execute()
+
+async def run_access_stats_flusher():
+    """Background task: write-behind of cache-hit stats every ACCESS_STATS_FLUSH_INTERVAL seconds."""
+    while True:
+        await asyncio.sleep(ACCESS_STATS_FLUSH_INTERVAL)
+        try:
+            await flush_access_stats()
+        except Exception as e:
+            logger.error(f"❌ Access Stats Flush Error: {e}")
 
 async def inspect_cache(limit: int = 100):
+    """Samples cached entries from the key index (one pipelined batch)."""
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.zremrangebyscore(CACHE_INDEX_KEY, "-inf", time.time())
+        pipe.zrandmember(CACHE_INDEX_KEY, limit)
+        _, keys = await pipe.execute()
+    if not keys: return []
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.get(key)
+            pipe.ttl(key)
+        res = await pipe.execute()
+
     items = []
-    count = 0
-    async for key in redis_client.scan_iter("*"):
-        if count >= limit: break
-        val = await redis_client.get(key)
-        ttl = await redis_client.ttl(key)
-        size = len(val) if val else 0
-        
+    expired = []
+    for key, val, ttl in zip(keys, res[::2], res[1::2]):
+        if val is None:
+            expired.append(key)
+            continue
+        size = len(val)
+
         item_type = "Search" if "search" in key else "Book" if "book" in key else "Data"
         try:
-            data = json.loads(val)
+            data = orjson.loads(val)
             preview = data.get("title", f"ASIN: {data.get('asin', 'Unknown')}")
-        except: preview = str(val)[:50]
+        except (ValueError, AttributeError): preview = str(val)[:50]
 
         items.append({"key": key, "type": item_type, "preview": preview, "ttl": ttl, "size": f"{round(size/1024, 2)} KB"})
-        count += 1
+
+    # Prune index entries whose key already expired
+    if expired:
+        await redis_client.zrem(CACHE_INDEX_KEY, *expired)
     return items
 
 async def delete_cache_key(key: str):
-    await redis_client.delete(key)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.delete(key)
+        pipe.zrem(CACHE_INDEX_KEY, key)
+        await pipe.execute()
 
 async def flush_all_cache():
+    # Pending hit counts live in Redis too: write them to Mongo before wiping
+    await flush_access_stats()
     await redis_client.flushdb()
 
 # --- SETTINGS ---
@@ -186,9 +441,36 @@ DEFAULT_SETTINGS = {
     "hardcover_api_key": ""
 }
 
+# Settings change rarely; keep a short-lived in-process copy (read-only for callers)
+SETTINGS_TTL = 60 # Seconds; saves invalidate every worker right away via SETTINGS_CHANNEL
+SETTINGS_CHANNEL = "settings:invalidate"
+_settings_cache = {"ts": 0.0, "val": None}
+
 async def get_system_settings():
+    if _settings_cache["val"] is not None and time.monotonic() - _settings_cache["ts"] < SETTINGS_TTL:
+        return _settings_cache["val"]
     config = await settings_collection.find_one({"_id": "global_config"})
-    return config if config else DEFAULT_SETTINGS
+    config = config if config else DEFAULT_SETTINGS
+    _settings_cache.update(ts=time.monotonic(), val=config)
+    return config
+
+def invalidate_system_settings():
+    _settings_cache["val"] = None
+
+async def run_settings_listener():
+    """Background task: drops the local settings cache whenever any worker saves settings."""
+    while True:
+        try:
+            async with redis_client.pubsub(ignore_subscribe_messages=True) as pubsub:
+                await pubsub.subscribe(SETTINGS_CHANNEL)
+                # Messages published while (re)subscribing are missed; the TTL bounds that
+                invalidate_system_settings()
+                while True:
+                    if await pubsub.get_message(timeout=1.0):
+                        invalidate_system_settings()
+        except Exception as e:
+            logger.error(f"❌ Settings Listener Error: {e}")
+            await asyncio.sleep(5)
 
 async def save_system_settings(providers: dict, search_limit: int, scrape_limit_pages: int, google_books_api_key: str = None, prh_api_key: str = None, hardcover_api_key: str = None):
     update_fields = {
@@ -213,6 +495,8 @@ async def save_system_settings(providers: dict, search_limit: int, scrape_limit_
         {"$set": update_fields},
         upsert=True
     )
+    invalidate_system_settings()
+    await redis_client.publish(SETTINGS_CHANNEL, "1")
 
 async def get_stored_password_hash():
     """Retrieves the admin password hash from the database."""
@@ -231,31 +515,79 @@ async def set_stored_password_hash(hash_str: str):
 async def get_custom_fields(asin: str):
     return await custom_fields_collection.find_one({"asin": asin}, {"_id": 0})
 
+async def get_custom_fields_many(asins: list):
+    """One $in query for many ASINs -> {asin: custom fields doc} for those that have any."""
+    if not asins: return {}
+    cursor = custom_fields_collection.find({"asin": {"$in": asins}}, {"_id": 0})
+    return {doc["asin"]: doc async for doc in cursor}
+
 async def save_custom_fields(asin: str, fields: dict):
     await custom_fields_collection.update_one({"asin": asin}, {"$set": fields}, upsert=True)
 
 # --- LOGGING & STATS (Unified) ---
 
-async def log_activity(action: str, target: str, details: str = None, device_id: str = "Unknown", country: str = "Unknown", duration_ms: float = 0.0, ip: str = None):
+# Log documents are queued and written in batches by run_log_writer()
+LOG_FLUSH_INTERVAL = 0.25 # Seconds
+LOG_FLUSH_BATCH = 500
+_log_queue = asyncio.Queue()
+_stats_queue = asyncio.Queue()
+_log_flush_event = asyncio.Event()
+
+def _enqueue_log(queue: asyncio.Queue, doc: dict):
+    queue.put_nowait(doc)
+    if queue.qsize() >= LOG_FLUSH_BATCH:
+        _log_flush_event.set()
+
+async def _debounce_logs(docs: list):
+    """
+    Drops activity logs already seen for the same device/action/target in the
+    last 5 seconds: one pipelined SET NX per doc instead of one per request.
+    """
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for doc in docs:
+            raw_key = f"{doc['device_id']}:{doc['action']}:{doc['target']}"
+            pipe.set(f"log_debounce:{hashlib.md5(raw_key.encode()).hexdigest()}", "1", ex=5, nx=True)
+        is_new = await pipe.execute()
+    return [doc for doc, new in zip(docs, is_new) if new]
+
+async def flush_log_queues():
+    """Writes everything queued so far with unordered insert_many batches."""
+    for queue, collection, debounce in ((_log_queue, logs_collection, True), (_stats_queue, provider_stats_collection, False)):
+        while not queue.empty():
+            batch = []
+            while len(batch) < LOG_FLUSH_BATCH and not queue.empty():
+                doc = queue.get_nowait()
+                # Queued with a raw epoch; convert here, off the request path
+                doc["timestamp"] = datetime.datetime.fromtimestamp(doc["timestamp"], datetime.timezone.utc)
+                batch.append(doc)
+            if debounce:
+                batch = await _debounce_logs(batch)
+            if batch:
+                await collection.insert_many(batch, ordered=False)
+
+async def run_log_writer():
+    """Background task: flushes queued logs every LOG_FLUSH_INTERVAL or once LOG_FLUSH_BATCH are waiting."""
+    while True:
+        try:
+            await asyncio.wait_for(_log_flush_event.wait(), LOG_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _log_flush_event.clear()
+        try:
+            await flush_log_queues()
+        except Exception as e:
+            logger.error(f"❌ Log Writer Error: {e}")
+
+def log_activity(action: str, target: str, details: str = None, device_id: str = "Unknown", country: str = "Unknown", duration_ms: float = 0.0, ip: str = None):
     """
-    Logs activity with Debouncing logic.
+    Queues an activity log; duplicates within 5 seconds are debounced by the writer.
     Accepts either 'device_id' (hashed) or 'ip' (legacy/fallback).
     """
     # Use IP as fallback ID if device_id not passed
     final_id = device_id if device_id != "Unknown" else (ip or "Unknown")
-    
-    # 1. Debounce Hash
-    raw_key = f"{final_id}:{action}:{target}"
-    log_hash = hashlib.md5(raw_key.encode()).hexdigest()
-    debounce_key = f"log_debounce:{log_hash}"
-
-    # 2. Atomic Lock check (5 seconds)
-    is_new = await redis_client.set(debounce_key, "1", ex=5, nx=True)
-    if not is_new: return
-
-    # 3. Log
-    await logs_collection.insert_one({
-        "timestamp": datetime.datetime.utcnow(),
+
+    _enqueue_log(_log_queue, {
+        "timestamp": time.time(),
         "action": action,
         "target": target,
         "details": details,
@@ -266,9 +598,9 @@ async def log_activity(action: str, target: str, details: str = None, device_id:
         "ip": ip if ip else final_id 
     })
 
-async def log_provider_stats(request_id: str, provider: str, duration_ms: float, result_count: int, status: str):
-    await provider_stats_collection.insert_one({
-        "timestamp": datetime.datetime.utcnow(),
+def log_provider_stats(request_id: str, provider: str, duration_ms: float, result_count: int, status: str):
+    _enqueue_log(_stats_queue, {
+        "timestamp": time.time(),
         "request_id": request_id, "provider": provider,
         "duration_ms": duration_ms, "result_count": result_count, "status": status
     })
@@ -276,20 +608,63 @@ async def log_provider_stats(request_id: str, provider: str, duration_ms: float,
 async def get_system_logs(limit: int = 100):
     return await logs_collection.find().sort("timestamp", -1).limit(limit).to_list(length=limit)
 
-async def get_traffic_stats():
-    total_requests = await logs_collection.count_documents({})
-
-    # 1. Distinct Devices
-    pipeline_devices = [{"$group": {"_id": "$device_id"}}, {"$count": "count"}]
-    dev_res = await logs_collection.aggregate(pipeline_devices).to_list(length=1)
-    distinct_devices = dev_res[0]["count"] if dev_res else 0
+# --- STATS (materialized in Redis) ---
+# The aggregations scan the whole logs collection, so the dashboards read a
+# precomputed copy refreshed in the background; recent-log lists stay live.
+STATS_KEY = "stats:dashboard"   # HASH: section name -> JSON
+STATS_LOCK_KEY = "stats:lock"
+STATS_TTL = 60
+STATS_LOCK_TTL = 10
+STATS_REFRESH_INTERVAL = 30 # Seconds
 
-    # 2. Country Stats
-    pipeline_geo = [
-        {"$group": {"_id": {"$ifNull": ["$country", "Unknown"]}, "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}}
+async def _dashboard_aggregates():
+    # PIPELINE:
+    # 1. Filter for fetch actions
+    # 2. Group by ASIN (target)
+    # 3. Sort by popularity
+    # 4. Join with 'books' collection to get the real Title
+    pipeline = [
+        {"$match": {"action": "fetch_metadata"}},
+        {"$group": {"_id": "$target", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1}},
+        {"$limit": 10},
+        # Join with books to get real title
+        {"$lookup": {
+            "from": "books",
+            "localField": "_id",
+            "foreignField": "asin",
+            "as": "book_info"
+        }},
+        # Extract title (fallback to ASIN if missing)
+        {"$project": {
+            "_id": 1, 
+            "count": 1,
+            "title": {"$ifNull": [{"$arrayElemAt": ["$book_info.title", 0]}, "$_id"]}
+        }}
     ]
-    geo_groups = await logs_collection.aggregate(pipeline_geo).to_list(length=None)
+    total_requests, top_books = await asyncio.gather(
+        logs_collection.estimated_document_count(),
+        logs_collection.aggregate(pipeline, allowDiskUse=False).to_list(length=10)
+    )
+    return {"total": total_requests, "top_books": top_books}
+
+async def _traffic_aggregates():
+    # Totals, distinct devices and country groups in one pass over the logs
+    pipeline = [{"$facet": {
+        "total": [{"$count": "n"}],
+        # 1. Distinct Devices
+        "devices": [{"$group": {"_id": "$device_id"}}, {"$count": "count"}],
+        # 2. Country Stats
+        "countries": [
+            {"$group": {"_id": {"$ifNull": ["$country", "Unknown"]}, "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}}
+        ]
+    }}]
+    facet_res = await logs_collection.aggregate(pipeline, allowDiskUse=False).to_list(length=1)
+    facet = facet_res[0] if facet_res else {}
+    total_requests = facet["total"][0]["n"] if facet.get("total") else 0
+    distinct_devices = facet["devices"][0]["count"] if facet.get("devices") else 0
+    geo_groups = facet.get("countries", [])
 
     sorted_countries = []
     for entry in geo_groups:
@@ -300,60 +675,88 @@ async def get_traffic_stats():
         sorted_countries.append({"code": code, "count": count, "percent": percent})
 
     avg_per_device = round(total_requests / distinct_devices, 2) if distinct_devices else 0
-    
-    # 3. Logs
-    recent_logs = await logs_collection.find().sort("timestamp", -1).limit(100).to_list(length=100)
 
     return {
         "total_requests": total_requests,
         "distinct_devices": distinct_devices,
         "avg_per_device": avg_per_device,
-        "countries": sorted_countries,
-        "logs": recent_logs
+        "countries": sorted_countries
     }
 
-async def get_detailed_stats():
+async def _provider_aggregates():
     pipeline = [
         {"$group": {"_id": "$provider", "total_calls": {"$sum": 1}, "total_results": {"$sum": "$result_count"}, "avg_latency": {"$avg": "$duration_ms"}, "successful_calls": {"$sum": {"$cond": [{"$eq": ["$status", "success"]}, 1, 0]}}}},
         {"$sort": {"total_calls": -1}}
     ]
-    stats = await provider_stats_collection.aggregate(pipeline).to_list(length=None)
-    recent = await provider_stats_collection.find().sort("timestamp", -1).limit(50).to_list(length=50)
+    return await provider_stats_collection.aggregate(pipeline, allowDiskUse=False).to_list(length=None)
+
+_STATS_SECTIONS = {
+    "dashboard": _dashboard_aggregates,
+    "traffic": _traffic_aggregates,
+    "providers": _provider_aggregates,
+}
+
+async def refresh_stats_view():
+    """Runs every stats aggregation and stores the results under STATS_KEY."""
+    results = dict(zip(_STATS_SECTIONS, await asyncio.gather(*(fn() for fn in _STATS_SECTIONS.values()))))
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(STATS_KEY, mapping={name: orjson.dumps(data) for name, data in results.items()})
+        pipe.expire(STATS_KEY, STATS_TTL)
+        await pipe.execute()
+    return results
+
+async def _refresh_stats_locked():
+    """refresh_stats_view guarded by STATS_LOCK_KEY; returns None if another worker holds it."""
+    if not await redis_client.set(STATS_LOCK_KEY, "1", nx=True, ex=STATS_LOCK_TTL):
+        return None
+    try:
+        return await refresh_stats_view()
+    finally:
+        await redis_client.delete(STATS_LOCK_KEY)
+
+async def _get_stats_section(name: str):
+    cached = await redis_client.hget(STATS_KEY, name)
+    if cached: return orjson.loads(cached)
+
+    # Miss (cold start / refresher down): one caller recomputes, the rest wait for it
+    results = await _refresh_stats_locked()
+    if results is not None: return results[name]
+    for _ in range(STATS_LOCK_TTL * 10):
+        await asyncio.sleep(0.1)
+        cached = await redis_client.hget(STATS_KEY, name)
+        if cached: return orjson.loads(cached)
+    return await _STATS_SECTIONS[name]()
+
+async def run_stats_refresher():
+    """Background task: keeps STATS_KEY warm every STATS_REFRESH_INTERVAL seconds."""
+    while True:
+        try:
+            await _refresh_stats_locked()
+        except Exception as e:
+            logger.error(f"❌ Stats Refresh Error: {e}")
+        await asyncio.sleep(STATS_REFRESH_INTERVAL)
+
+async def get_traffic_stats():
+    stats, recent_logs = await asyncio.gather(
+        _get_stats_section("traffic"),
+        logs_collection.find().sort("timestamp", -1).limit(100).to_list(length=100)
+    )
+    return {**stats, "logs": recent_logs}
+
+async def get_detailed_stats():
+    stats, recent = await asyncio.gather(
+        _get_stats_section("providers"),
+        provider_stats_collection.find().sort("timestamp", -1).limit(50).to_list(length=50)
+    )
     return {"aggregated": stats, "recent": recent}
 
 async def get_dashboard_stats():
-    total_requests = await logs_collection.count_documents({})
-    
-    # PIPELINE:
-    # 1. Filter for fetch actions
-    # 2. Group by ASIN (target)
-    # 3. Sort by popularity
-    # 4. Join with 'books' collection to get the real Title
-    pipeline = [
-        {"$match": {"action": "fetch_metadata"}},
-        {"$group": {"_id": "$target", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}},
-        {"$limit": 10},
-        # Join with books to get real title
-        {"$lookup": {
-            "from": "books",
-            "localField": "_id",
-            "foreignField": "asin",
-            "as": "book_info"
-        }},
-        # Extract title (fallback to ASIN if missing)
-        {"$project": {
-            "_id": 1, 
-            "count": 1,
-            "title": {"$ifNull": [{"$arrayElemAt": ["$book_info.title", 0]}, "$_id"]}
-        }}
-    ]
-    
-    top_books = await logs_collection.aggregate(pipeline).to_list(length=10)
-    
-    recent_logs = await logs_collection.find().sort("timestamp", -1).limit(20).to_list(length=20)
+    stats, recent_logs = await asyncio.gather(
+        _get_stats_section("dashboard"),
+        logs_collection.find().sort("timestamp", -1).limit(20).to_list(length=20)
+    )
+    return {**stats, "recent_logs": recent_logs}
 
-    return {"total": total_requests, "top_books": top_books, "recent_logs": recent_logs}
 # --- LISTS LOGIC ---
 
 async def save_imported_list(name: str, url: str, asins: list, source: str = "Audible"):
@@ -380,14 +783,17 @@ async def get_all_lists():
     return await lists_collection.find().sort("created_at", -1).to_list(length=None)
 
 async def get_list_by_id(list_id: str):
+    # Cheap hex check first: skips the exception path for non-ObjectId ids
+    if not ObjectId.is_valid(list_id): return None
     try: return await lists_collection.find_one({"_id": ObjectId(list_id)})
-    except: return None
+    except InvalidId: return None
 
 async def delete_list_by_id(list_id: str):
+    if not ObjectId.is_valid(list_id): return False
     try:
         await lists_collection.delete_one({"_id": ObjectId(list_id)})
         return True
-    except: return False
+    except InvalidId: return False
 
 # --- UNIFIED CATALOG ---
 
@@ -1,13 +1,11 @@
 from slowapi import Limiter
 from slowapi.util import get_remote_address
-import os
-
-# Use the redis connection string from env
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+from app.redis_pool import REDIS_URL, REDIS_POOL_OPTIONS
 
 # Initialize Limiter using Redis as storage
 limiter = Limiter(
     key_func=get_remote_address,
     storage_uri=REDIS_URL,
+    storage_options=REDIS_POOL_OPTIONS,
     default_limits=["200/minute"] # Default global limit
 )
\ No newline at end of file
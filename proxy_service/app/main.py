@@ -1,48 +1,49 @@
 import sys
+import queue
+import asyncio
 import logging
+from logging.handlers import QueueHandler, QueueListener
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
-# --- RATE LIMITING IMPORTS (Fixes your error) ---
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-
-from app.routers import api, ui
-from app.database import init_db_indexes
-from app.limiter import limiter
-
 # --- LOGGING CONFIGURATION ---
+# Set up before the app modules are imported so their startup messages are captured.
 LOG_FILE = "system.log"
 
-# 1. Configure File Logging
+# 1. Console + file handlers, driven by a background listener thread
+#    (request handlers only enqueue records, they never block on disk/terminal I/O)
 file_handler = logging.FileHandler(LOG_FILE, mode='a', encoding='utf-8')
-formatter = logging.Formatter("%(asctime)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
-file_handler.setFormatter(formatter)
+file_handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
 
-# 2. Attach to Uvicorn (Server Logs)
-uvicorn_logger = logging.getLogger("uvicorn.access")
-uvicorn_logger.addHandler(file_handler)
+# Uvicorn prints its own logs to the console already; only mirror ours
+console_handler = logging.StreamHandler(sys.stdout)
+console_handler.setFormatter(logging.Formatter("%(message)s"))
+console_handler.addFilter(lambda record: not record.name.startswith("uvicorn"))
 
-error_logger = logging.getLogger("uvicorn.error")
-error_logger.addHandler(file_handler)
+queue_handler = QueueHandler(queue.SimpleQueue())
+log_listener = QueueListener(queue_handler.queue, file_handler, console_handler)
+log_listener.start()
 
-# 3. Capture 'print()' statements
-class PrintLogger:
-    def __init__(self, logger, level=logging.INFO):
-        self.logger = logger
-        self.level = level
-        self.terminal = sys.__stdout__
+# 2. App loggers (logging.getLogger(__name__) in each module)
+root_logger = logging.getLogger()
+root_logger.setLevel(logging.INFO)
+root_logger.addHandler(queue_handler)
 
-    def write(self, message):
-        self.terminal.write(message)
-        if message.strip():
-            self.logger.log(self.level, message.strip())
+# 3. Attach to Uvicorn (Server Logs) - these don't propagate to root
+logging.getLogger("uvicorn.access").addHandler(queue_handler)
+logging.getLogger("uvicorn.error").addHandler(queue_handler)
 
-    def flush(self):
-        self.terminal.flush()
+logger = logging.getLogger(__name__)
 
-sys.stdout = PrintLogger(error_logger, logging.INFO)
+# --- RATE LIMITING IMPORTS (Fixes your error) ---
+from slowapi import _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+
+from app.routers import api, ui
+from app.services import geoip, audible, google_books, hardcover, compiler
+from app.database import init_db_indexes, run_log_writer, flush_log_queues, run_stats_refresher, run_access_stats_flusher, flush_access_stats, run_settings_listener
+from app.limiter import limiter
 
 # --- APP DEFINITION ---
 app = FastAPI(title="Audiobook Metadata Proxy")
@@ -73,7 +74,24 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_db_client():
     await init_db_indexes()
-    print(f"📝 System Logging fully initialized to {LOG_FILE}")
+    app.state.log_writer = asyncio.create_task(run_log_writer())
+    app.state.stats_refresher = asyncio.create_task(run_stats_refresher())
+    app.state.access_stats_flusher = asyncio.create_task(run_access_stats_flusher())
+    app.state.settings_listener = asyncio.create_task(run_settings_listener())
+    logger.info(f"📝 System Logging fully initialized to {LOG_FILE}")
+
+@app.on_event("shutdown")
+async def shutdown_db_client():
+    app.state.log_writer.cancel()
+    app.state.stats_refresher.cancel()
+    app.state.access_stats_flusher.cancel()
+    app.state.settings_listener.cancel()
+    await flush_log_queues()
+    await flush_access_stats()
+    await geoip.batcher.close()
+    await audible.close_client()
+    await asyncio.gather(google_books.client.aclose(), hardcover.client.aclose(), compiler.client.aclose())
+    log_listener.stop()
 
 app.include_router(api.router)
 app.include_router(ui.router)
@@ -0,0 +1,20 @@
+import os
+import redis.asyncio as redis
+
+# Use the redis connection string from env
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+
+# Shared by the app pool and the rate limiter's (sync) client
+REDIS_POOL_OPTIONS = {
+    "max_connections": 64,
+    "socket_keepalive": True,
+    "socket_timeout": 2,
+    "health_check_interval": 30,
+}
+
+# One pool for all async Redis traffic (cache, geo, stats, logs).
+# Blocking: when all connections are busy, callers wait for one instead of erroring.
+pool = redis.BlockingConnectionPool.from_url(REDIS_URL, decode_responses=True, timeout=5, **REDIS_POOL_OPTIONS)
+
+def get_redis():
+    return redis.Redis(connection_pool=pool)
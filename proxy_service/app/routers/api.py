@@ -1,36 +1,91 @@
+import os
 import asyncio
-import uuid
+import secrets
 import time
+import hashlib
 import datetime
+import logging
+from functools import lru_cache
 from typing import Optional, List, Union
-import httpx
+import orjson
 
 from fastapi import APIRouter, HTTPException, Query, Depends, Request, BackgroundTasks
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
+from audible.exceptions import NotFoundError
 
 # --- IMPORTS ---
 from app.database import (
-    get_cache, 
+    get_cache_multi,
+    get_cached_book,
+    wait_for_cache,
     set_cache, 
+    set_cache_many,
     save_custom_fields, 
     log_activity, 
     get_custom_fields, 
+    get_custom_fields_many,
     log_provider_stats,
     get_system_settings,
     save_imported_list,
     create_custom_list,
     upsert_book_to_db, 
+    bulk_upsert_books,
     get_book_from_db,
+    get_stored_asins,
+    get_books_from_db_many,
     get_all_lists,
+    bump_access_stats,
+    apply_access_stats,
     get_list_by_id,
     redis_client 
 )
-from app.services import audible, itunes, goodreads, compiler, prh, google_books, hardcover, unifier
+from app.services import audible, itunes, goodreads, compiler, prh, google_books, hardcover, unifier, geoip
 from app.auth import get_current_user
-from app.utils import get_device_hash
+from app.utils import get_device_hash, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Audible's concurrency budget (in-flight fetch+compile jobs per worker)
+AUDIBLE_CONCURRENCY = 8
+# Request-rate cap shared by every Audible call in this worker
+AUDIBLE_RATE = TokenBucket(rate=float(os.getenv("AUDIBLE_RATE_LIMIT", "20")), burst=AUDIBLE_CONCURRENCY)
+# Caps in-flight Audible fetch+compile jobs across all concurrent searches
+# and imports (a per-call semaphore let N parallel imports run N x 8)
+_AUDIBLE_SEM = asyncio.Semaphore(AUDIBLE_CONCURRENCY)
+
+async def audible_call(func, *args, **kwargs):
+    """Awaits an audible.* API call, within AUDIBLE_RATE."""
+    await AUDIBLE_RATE.acquire()
+    return await func(*args, **kwargs)
+
+# Strong refs for fire-and-forget tasks (the loop only keeps weak ones)
+_background_tasks = set()
+# Caps how many background writes hit Redis/Mongo at once during bursts
+BACKGROUND_WRITE_LIMIT = 32
+_background_gate = asyncio.Semaphore(BACKGROUND_WRITE_LIMIT)
+
+async def _gated_write(coro):
+    async with _background_gate:
+        try:
+            await coro
+        except Exception as e:
+            logger.error(f"❌ Background Write Error: {e}")
+
+def _fire(coro):
+    """Schedules a write without awaiting it (off the response path)."""
+    task = asyncio.create_task(_gated_write(coro))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+class OrjsonResponse(JSONResponse):
+    """JSONResponse rendered by orjson (fastapi's ORJSONResponse is deprecated)."""
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
 
-# Protect all routes
-router = APIRouter(dependencies=[Depends(get_current_user)])
+# Protect all routes; responses are encoded with orjson
+router = APIRouter(default_response_class=OrjsonResponse, dependencies=[Depends(get_current_user)])
 
 # --- MODELS ---
 class CustomFieldsRequest(BaseModel):
@@ -82,29 +137,24 @@ async def process_client_info(request: Request):
     geo_key = f"geo_ip:{client_ip}"
     country = await redis_client.get(geo_key)
 
-    # 2. If missing, fetch from API
+    # 2. If missing, fetch from API (one caller per IP across workers; the rest
+    #    skip the lookup instead of spending ip-api.com's 45 req/min budget)
     if not country:
-        try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(f"http://ip-api.com/json/{client_ip}", timeout=1.5)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    country = data.get("countryCode", "Unknown")
-                else:
-                    country = "Unknown"
-        except:
+        if await redis_client.set(f"geo_ip:lock:{client_ip}", "1", nx=True, ex=10):
+            # Coalesced with other pending lookups into one /batch call
+            country = await geoip.batcher.lookup(client_ip)
+            await redis_client.set(geo_key, country, ex=2592000) # Cache 30 days
+        else:
             country = "Unknown"
-        
-        await redis_client.set(geo_key, country, ex=2592000) # Cache 30 days
 
     # 3. Anonymize IP
     device_hash = get_device_hash(client_ip)
     
     return device_hash, country
 
-def _init_stats(book_data):
-    """Injects default stats fields."""
-    now = datetime.datetime.utcnow().isoformat()
+def _init_stats(book_data, now_iso: str = None):
+    """Injects default stats fields. Pass now_iso to share one timestamp across a batch."""
+    now = now_iso or datetime.datetime.utcnow().isoformat()
     if "cached_at" not in book_data: book_data["cached_at"] = now
     if "last_accessed" not in book_data: book_data["last_accessed"] = now
     if "access_count" not in book_data: book_data["access_count"] = 1
@@ -114,76 +164,70 @@ def _init_stats(book_data):
 def transform_to_abs_format(book: dict):
     """
     Maps internal schema to Audiobookshelf JSON schema.
+    Runs once per result on every search response, so `book.get` is bound once.
     """
-    # 1. Duration: Convert minutes to seconds
-    duration = (book.get("runtime_minutes") or 0) * 60
-    
-    # 2. Publish Year: Extract YYYY from YYYY-MM-DD
-    pub_date = book.get("published_date")
-    pub_year = pub_date[:4] if pub_date and len(pub_date) >= 4 else None
-
-    # 3. Series mapping (ABS expects list of objects)
-    series_mapped = []
-    for s in book.get("series", []):
-        series_mapped.append({
-            "sequence": s.get("sequence"),
-            "name": s.get("name")
-        })
-
-    # 4. Flatten Authors List -> Single String
-    # e.g. ["Author A", "Author B"] -> "Author A, Author B"
-    author_string = ", ".join(book.get("authors", []))
-    narrator_string = ", ".join(book.get("narrators", []))
+    g = book.get
+    asin = g("asin")
+    pub_date = g("published_date")
 
     return {
-        "id": book.get("asin"), 
-        "asin": book.get("asin"),
-        "isbn": book.get("asin"),
-        "title": book.get("title"),
-        "subtitle": book.get("subtitle"),
+        "id": asin, 
+        "asin": asin,
+        "isbn": asin,
+        "title": g("title"),
+        "subtitle": g("subtitle"),
         
         # --- CHANGED FIELD ---
-        "author": author_string,    
-        "narrator": narrator_string,
+        # ["Author A", "Author B"] -> "Author A, Author B"
+        "author": ", ".join(g("authors") or ()),    
+        "narrator": ", ".join(g("narrators") or ()),
         # ---------------------
 
-        "series": series_mapped,
-        "genres": book.get("genres", []),
-        "publishedYear": pub_year,
+        # ABS expects a list of {sequence, name} objects
+        "series": [{"sequence": s.get("sequence"), "name": s.get("name")} for s in g("series") or ()],
+        "genres": g("genres", []),
+        # YYYY-MM-DD -> YYYY
+        "publishedYear": pub_date[:4] if pub_date and len(pub_date) >= 4 else None,
         "publishedDate": pub_date,
-        "publisher": book.get("publisher"),
-        "description": book.get("description"),
-        "language": book.get("language"),
+        "publisher": g("publisher"),
+        "description": g("description"),
+        "language": g("language"),
         "explicit": False,
         "abridged": False,
-        "cover": book.get("cover_image"),
-        "duration": duration,
+        "cover": g("cover_image"),
+        # minutes -> seconds
+        "duration": (g("runtime_minutes") or 0) * 60,
         
-        "provider": book.get("provider"),
-        "rating": book.get("rating"),
-        "rating_count": book.get("rating_count")
+        "provider": g("provider"),
+        "rating": g("rating"),
+        "rating_count": g("rating_count")
     }
 
-async def benchmark_call(request_id: str, provider_name: str, func, *args, **kwargs):
-    start_time = time.time()
+# Result count per provider return shape: lists, (title, items) tuples, single items
+_RESULT_COUNTERS = {
+    list: len,
+    tuple: lambda r: len(r[1]) if len(r) > 1 else 0,
+}
+_count_single = lambda r: 1 if r else 0
+
+async def benchmark_async(request_id: str, provider_name: str, func, *args, **kwargs):
+    """
+    Awaits an async provider call and records its latency/result count.
+    Audible calls are wrapped with audible_call() (rate limit) by the caller.
+    """
+    start_time = time.perf_counter()
     status = "success"
     results = []
     try:
-        if asyncio.iscoroutinefunction(func):
-            results = await func(*args, **kwargs)
-        else:
-            results = await asyncio.to_thread(func, *args, **kwargs)
+        results = await func(*args, **kwargs)
     except Exception as e:
         status = "error"
-        print(f"❌ Error in {provider_name}: {e}")
+        logger.error(f"❌ Error in {provider_name}: {e}")
     finally:
-        duration = (time.time() - start_time) * 1000
-        count = 0
-        if isinstance(results, list): count = len(results)
-        elif isinstance(results, tuple): count = len(results[1]) if len(results) > 1 else 0
-        elif results: count = 1
+        duration = (time.perf_counter() - start_time) * 1000
+        count = _RESULT_COUNTERS.get(type(results), _count_single)(results)
         
-        await log_provider_stats(request_id, provider_name, round(duration, 2), result_count=count, status=status)
+        log_provider_stats(request_id, provider_name, round(duration, 2), result_count=count, status=status)
     return results
 
 # --- PING ENDPOINT ---
@@ -212,6 +256,18 @@ async def search_local_library(q: str = Query(..., min_length=2)):
         })
     return simple
 
+SEARCH_PROVIDERS = ("audible", "itunes", "goodreads", "prh", "google", "hardcover")
+
+@lru_cache(maxsize=64)
+def _parse_providers(providers: str):
+    """'audible,iTunes' -> one use_* flag per SEARCH_PROVIDERS entry (memoized; clients repeat the same strings)."""
+    target_list = {p.lower().strip() for p in providers.split(",")}
+    return tuple(name in target_list for name in SEARCH_PROVIDERS)
+
+SEARCH_LOCK_TTL = 30 # Seconds; upper bound on one multi-provider search
+_PENDING = object() # Provider slot not filled yet (results may legitimately be None)
+_inflight_searches = {} # cache_key -> running search task on this worker
+
 @router.get("/search")
 async def search_audiobook(
     request: Request,
@@ -221,7 +277,7 @@ async def search_audiobook(
     providers: Optional[str] = Query(None),
     min_rating: Optional[float] = Query(None)
 ):
-    start_ts = time.time()
+    start_ts = time.perf_counter()
     device_id, country = await process_client_info(request)
 
     if not q and not author and not isbn:
@@ -232,119 +288,163 @@ async def search_audiobook(
     limit = config.get("search_limit", 5)
 
     cache_str = f"q={q}:auth={author}:isbn={isbn}:prov={providers}:rate={min_rating}:lim={limit}"
-    clean_key = cache_str.lower().replace(" ", "").replace(",", "_")
-    cache_key = f"search_v14:{clean_key}"
+    # Fixed-size key: hash of the canonical params instead of embedding raw input
+    params = repr((q, author, isbn, providers, min_rating, limit)).lower()
+    # Holds the response body itself (already ABS-formatted); bump the
+    # version whenever transform_to_abs_format changes
+    cache_key = "search_abs_v1:" + hashlib.blake2b(params.encode(), digest_size=16).hexdigest()
     
-    if cached := await get_cache(cache_key):
-        duration = (time.time() - start_ts) * 1000
-        await log_activity("search", cache_str, details="Cache Hit", device_id=device_id, country=country, duration_ms=duration)
-        return [transform_to_abs_format(b) for b in cached]
+    # Hit: hand the stored JSON straight back, no decode/transform/encode
+    if (cached := await redis_client.get(cache_key)) and cached != "[]":
+        duration = (time.perf_counter() - start_ts) * 1000
+        log_activity("search", cache_str, details="Cache Hit", device_id=device_id, country=country, duration_ms=duration)
+        return Response(content=cached, media_type="application/json")
+
+    async def run_search():
+        # Cross-worker single-flight: the first miss queries the providers, identical
+        # searches on other workers wait for its cache write instead of fanning out too
+        lock_key = f"lock:{cache_key}"
+        owns_lock = await redis_client.set(lock_key, "1", nx=True, ex=SEARCH_LOCK_TTL)
+        if not owns_lock:
+            # None: the owner failed without caching, so run the search here instead
+            if (cached := await wait_for_cache(cache_key, lock_key, SEARCH_LOCK_TTL)) is not None:
+                duration = (time.perf_counter() - start_ts) * 1000
+                log_activity("search", cache_str, details="Cache Hit (coalesced)", device_id=device_id, country=country, duration_ms=duration)
+                return cached
 
-    try:
-        req_id = str(uuid.uuid4())
-        tasks = []
-        
-        if providers:
-            target_list = [p.lower().strip() for p in providers.split(",")]
-            use_audible = "audible" in target_list
-            use_itunes = "itunes" in target_list
-            use_goodreads = "goodreads" in target_list
-            use_prh = "prh" in target_list
-            use_google = "google" in target_list
-            use_hardcover = "hardcover" in target_list
-        else:
-            use_audible = active_providers.get("audible", True)
-            use_itunes = active_providers.get("itunes", True)
-            use_goodreads = active_providers.get("goodreads", True)
-            use_prh = active_providers.get("prh", True)
-            use_google = active_providers.get("google", False)
-            use_hardcover = active_providers.get("hardcover", False)
-
-        if use_audible:
-            async def run_audible():
-                raw = await asyncio.to_thread(audible.search_raw, query=q, author=author, isbn=isbn, limit=limit)
-                if raw:
-                    sub = [compiler.compile_audible_metadata(p['asin'], p) for p in raw]
-                    return await asyncio.gather(*sub)
-                return []
-            tasks.append(benchmark_call(req_id, "Audible", run_audible))
-
-        if use_itunes:
-            tasks.append(benchmark_call(req_id, "iTunes", itunes.search_raw, query=q, author=author, isbn=isbn, limit=limit))
-
-        if use_goodreads:
-            search_term = isbn if isbn else (f"{q} {author}" if q and author else (q or author))
-            tasks.append(benchmark_call(req_id, "Goodreads", goodreads.search_scraper, search_term))
-
-        if use_prh:
-                    if isbn:
-                        # FIX: If we have an ISBN, use fetch_details (direct lookup)
-                        # instead of search_raw (text search), which often fails for numbers.
-                        async def prh_isbn_lookup():
-                            # Ensure clean ISBN (PRH dislikes hyphens in URL path)
-                            clean_isbn = isbn.replace("-", "").strip()
-                            detail = await prh.fetch_details(clean_isbn)
-                            return [detail] if detail else []
-
-                        tasks.append(benchmark_call(req_id, "PRH", prh_isbn_lookup))
-                    else:
-                        # Standard text search
-                        search_term = q or author
-                        if search_term:
-                            tasks.append(benchmark_call(req_id, "PRH", prh.search_raw, search_term, limit=limit))
-        if use_google:
-            search_term = isbn if isbn else (f"{q} {author}" if q and author else (q or author))
-            api_key = config.get("google_books_api_key")
-            if api_key:
-                tasks.append(benchmark_call(req_id, "Google Books", google_books.search_book, search_term, api_key, limit=limit))
-            else:
-                print("⚠️ Google Books enabled but no API Key found.")
+        try:
+            req_id = secrets.token_hex(8)
+            tasks = []
         
-        if use_hardcover:
-            search_term = q or author
-            api_key = config.get("hardcover_api_key")
-            if api_key:
-                tasks.append(benchmark_call(req_id, "Hardcover", hardcover.search_book, search_term, api_key, limit=limit))
+            if providers:
+                use_audible, use_itunes, use_goodreads, use_prh, use_google, use_hardcover = _parse_providers(providers)
             else:
-                print("⚠️ Hardcover enabled but no API Key found.")
-
-        results_list = await asyncio.gather(*tasks)
+                use_audible = active_providers.get("audible", True)
+                use_itunes = active_providers.get("itunes", True)
+                use_goodreads = active_providers.get("goodreads", True)
+                use_prh = active_providers.get("prh", True)
+                use_google = active_providers.get("google", False)
+                use_hardcover = active_providers.get("hardcover", False)
+
+            # Free-text terms shared by the scraper/API providers below
+            combined_term = isbn or " ".join(p for p in (q, author) if p)  # Goodreads, Google Books
+            text_term = q or author                                         # PRH, Hardcover
+
+            if use_audible:
+                async def run_audible():
+                    raw = await audible_call(audible.search_raw, query=q, author=author, isbn=isbn, limit=limit)
+                    if raw:
+                        custom = await get_custom_fields_many([p['asin'] for p in raw])
+                        # compile_audible_metadata does I/O (Audnexus), so it stays
+                        # async; just cap how many run at once
+                        async def _compile(p):
+                            async with _AUDIBLE_SEM:
+                                return await compiler.compile_audible_metadata(p['asin'], p, custom_fields=custom.get(p['asin'], {}))
+                        return await asyncio.gather(*[_compile(p) for p in raw])
+                    return []
+                tasks.append(benchmark_async(req_id, "Audible", run_audible))
+
+            if use_itunes:
+                tasks.append(benchmark_async(req_id, "iTunes", itunes.search_raw, query=q, author=author, isbn=isbn, limit=limit))
+
+            if use_goodreads:
+                tasks.append(benchmark_async(req_id, "Goodreads", goodreads.search_scraper, combined_term))
+
+            if use_prh:
+                        if isbn:
+                            # FIX: If we have an ISBN, use fetch_details (direct lookup)
+                            # instead of search_raw (text search), which often fails for numbers.
+                            async def prh_isbn_lookup():
+                                # Ensure clean ISBN (PRH dislikes hyphens in URL path)
+                                clean_isbn = isbn.replace("-", "").strip()
+                                detail = await prh.fetch_details(clean_isbn)
+                                return [detail] if detail else []
+
+                            tasks.append(benchmark_async(req_id, "PRH", prh_isbn_lookup))
+                        else:
+                            # Standard text search
+                            if text_term:
+                                tasks.append(benchmark_async(req_id, "PRH", prh.search_raw, text_term, limit=limit))
+            if use_google:
+                api_key = config.get("google_books_api_key")
+                if api_key:
+                    tasks.append(benchmark_async(req_id, "Google Books", google_books.search_book, combined_term, api_key, limit=limit))
+                else:
+                    logger.warning("⚠️ Google Books enabled but no API Key found.")
         
-        full_results = []
-        seen_ids = set()
-        for provider_results in results_list:
-            if provider_results: full_results.extend(provider_results)
-
-        filtered_results = []
-        for book in full_results:
-            if min_rating:
-                r = book.get("rating")
-                if r is None or r < min_rating: continue
-            if book['asin'] in seen_ids: continue
-            seen_ids.add(book['asin'])
-            
-            book = _init_stats(book)
-            filtered_results.append(book)
-
-        # Cache & Persist
-        for book in filtered_results:
-            if book and "asin" in book:
-                await upsert_book_to_db(book)
-                await set_cache(f"book_v7:{book['asin']}", book)
-
-        await set_cache(cache_key, filtered_results)
+            if use_hardcover:
+                api_key = config.get("hardcover_api_key")
+                if api_key:
+                    tasks.append(benchmark_async(req_id, "Hardcover", hardcover.search_book, text_term, api_key, limit=limit))
+                else:
+                    logger.warning("⚠️ Hardcover enabled but no API Key found.")
+
+            # Single pass over provider results: rating filter + dedup in provider
+            # order. Results are taken as they complete; each time the next
+            # provider(s) in order are in, their new books start persisting while
+            # slower providers are still running.
+            filtered_results = []
+            seen_ids = set()
+            mark_seen = seen_ids.add
+            now_iso = datetime.datetime.utcnow().isoformat()
+            slots = [_PENDING] * len(tasks)
+            next_slot = 0
+            writes = []
+
+            async def _indexed(i, task):
+                return i, await task
+
+            for done in asyncio.as_completed([_indexed(i, t) for i, t in enumerate(tasks)]):
+                i, slots[i] = await done
+                fresh = []
+                while next_slot < len(slots) and slots[next_slot] is not _PENDING:
+                    for book in slots[next_slot] or ():
+                        asin = book.get("asin")
+                        if not asin or asin in seen_ids: continue
+                        if min_rating:
+                            r = book.get("rating")
+                            if r is None or r < min_rating: continue
+                        mark_seen(asin)
+                        # _init_stats, inlined for this hot loop
+                        book.setdefault("cached_at", now_iso)
+                        book.setdefault("last_accessed", now_iso)
+                        book.setdefault("access_count", 1)
+                        fresh.append(book)
+                    next_slot += 1
+                if fresh:
+                    filtered_results.extend(fresh)
+                    writes.append(asyncio.create_task(bulk_upsert_books(fresh)))
+
+            # Cache in one Redis pipeline alongside the remaining bulk_writes
+            caches = {f"book_v7:{b['asin']}": b for b in filtered_results}
+            caches[cache_key] = [transform_to_abs_format(b) for b in filtered_results]
+            await asyncio.gather(*writes, set_cache_many(caches))
         
-        duration = (time.time() - start_ts) * 1000
-        await log_activity("search", cache_str, details="Multi-Provider Query", device_id=device_id, country=country, duration_ms=duration)
+            duration = (time.perf_counter() - start_ts) * 1000
+            log_activity("search", cache_str, details="Multi-Provider Query", device_id=device_id, country=country, duration_ms=duration)
         
-        # Return ABS format
-        # UNIFIED PATH:
-        unified_results = await unifier.unify_search_results([filtered_results])
-        return [transform_to_abs_format(b) for b in unified_results]
+            # Return ABS format
+            # UNIFIED PATH:
+            unified_results = await unifier.unify_search_results([filtered_results])
+            return [transform_to_abs_format(b) for b in unified_results]
 
-    except Exception as e:
-        print(f"❌ Global Search Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        except Exception as e:
+            logger.error(f"❌ Global Search Error: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            if owns_lock: await redis_client.delete(lock_key)
+
+    # In-process single-flight: identical searches on this worker share one
+    # task (the Redis lock inside coalesces across workers)
+    if (task := _inflight_searches.get(cache_key)) is not None:
+        result = await asyncio.shield(task)
+        duration = (time.perf_counter() - start_ts) * 1000
+        log_activity("search", cache_str, details="Cache Hit (coalesced)", device_id=device_id, country=country, duration_ms=duration)
+        return result
+    task = _inflight_searches[cache_key] = asyncio.create_task(run_search())
+    task.add_done_callback(lambda _: _inflight_searches.pop(cache_key, None))
+    # Shielded: a client disconnecting doesn't cancel the search for the others
+    return await asyncio.shield(task)
 
 # --- 1b. PRH EXTENSIONS ---
 @router.get("/prh/also-purchased/{isbn}")
@@ -356,72 +456,191 @@ async def get_prh_recommendations(isbn: str):
     return results
 
 # --- 2. DETAILS ENDPOINT ---
+PROVIDER_TIMEOUT = 5 # Seconds per provider in the /book fallback chain
+
+async def _try_provider(provider_name: str, asin: str, coro):
+    """
+    Awaits one provider lookup, time-boxed so a hung provider can't stall the
+    fallback chain. Returns (data, clean): a provider's own "not found"
+    (Audible's NotFoundError, or None from the others) is a clean miss;
+    errors and timeouts are not. Cancellation still propagates.
+    """
+    try:
+        return await asyncio.wait_for(coro, PROVIDER_TIMEOUT), True
+    except NotFoundError:
+        return None, True
+    except Exception as e:
+        logger.debug(f"{provider_name} miss for {asin}: {e!r}")
+        return None, False
+
+PROVIDER_GRACE = 0.1 # Seconds a preferred provider still gets once a fallback has answered
+BOOK_MISS_TTL = 300 # Seconds an unknown ASIN answers 404 without asking the providers again
+
+async def _race_providers(asin: str, candidates: list):
+    """
+    Runs the /book fallback providers concurrently. candidates is a list of
+    (name, coro) in priority order; returns (data, name, True) for the best
+    provider that answered, else (None, None, clean) where clean means every
+    provider reported a plain "not found". A lower-priority answer is only used
+    if every preferred provider is still out PROVIDER_GRACE seconds later.
+    """
+    tasks = [asyncio.create_task(_try_provider(name, asin, coro)) for name, coro in candidates]
+    try:
+        pending = set(tasks)
+        while pending:
+            _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            first = next((i for i, t in enumerate(tasks) if t.done() and t.result()[0]), None)
+            if first is None: continue
+
+            if preferred := [t for t in tasks[:first] if not t.done()]:
+                await asyncio.wait(preferred, timeout=PROVIDER_GRACE)
+            for (name, _), task in zip(candidates, tasks):
+                if task.done() and (data := task.result()[0]):
+                    return data, name, True
+        return None, None, all(t.result()[1] for t in tasks)
+    finally:
+        for task in tasks: task.cancel()
+
 @router.get("/book/{asin}")
 async def get_book_details(asin: str, request: Request):
-    start_ts = time.time()
+    start_ts = time.perf_counter()
     device_id, country = await process_client_info(request)
     cache_key = f"book_v7:{asin}"
+    miss_key = f"book_miss:{asin}"
     
-    def get_dur(): return (time.time() - start_ts) * 1000
-
-    # 1. Cache Check
-    if cached := await get_cache(cache_key):
-        cached["access_count"] = cached.get("access_count", 0) + 1
+    def get_dur(): return (time.perf_counter() - start_ts) * 1000
+
+    # Cache, DB and custom fields are independent lookups: start them together
+    db_task = asyncio.create_task(get_book_from_db(asin))
+    custom_task = asyncio.create_task(get_custom_fields(asin))
+
+    # 1. Cache Check (the negative-cache flag and pending hit count ride along in the same round trip)
+    cached, known_miss, pending_hits = await get_cached_book(asin, cache_key, miss_key)
+    if cached:
+        db_task.cancel()
+        # Stats go to a side hash in the background; no write-back of the book
+        cached["access_count"] = cached.get("access_count", 0) + pending_hits + 1
         cached["last_accessed"] = datetime.datetime.utcnow().isoformat()
-        await set_cache(cache_key, cached)
-        cached["custom_metadata"] = await get_custom_fields(asin) or {}
-        await log_activity("fetch_metadata", asin, details="Redis Hit", device_id=device_id, country=country, duration_ms=get_dur())
+        _fire(bump_access_stats(asin, cached["last_accessed"]))
+        cached["custom_metadata"] = await custom_task or {}
+        log_activity("fetch_metadata", asin, details="Redis Hit", device_id=device_id, country=country, duration_ms=get_dur())
         return cached
 
     # 2. DB Check
-    if stored := await get_book_from_db(asin):
-        await set_cache(cache_key, stored)
-        stored["custom_metadata"] = await get_custom_fields(asin) or {}
-        await log_activity("fetch_metadata", asin, details="Mongo Hit", device_id=device_id, country=country, duration_ms=get_dur())
+    if stored := await db_task:
+        # Cache the library copy as is: cache hits add the pending hits themselves
+        _fire(set_cache(cache_key, dict(stored)))
+        stored = await apply_access_stats(asin, stored)
+        stored["custom_metadata"] = await custom_task or {}
+        log_activity("fetch_metadata", asin, details="Mongo Hit", device_id=device_id, country=country, duration_ms=get_dur())
         return stored
 
+    # 3. Known miss: skip the provider fan-out for ASINs that just 404'd.
+    # (Books added since are found by the cache/DB checks above.)
+    if known_miss:
+        custom_task.cancel()
+        log_activity("fetch_error", asin, details="Not found (cached)", device_id=device_id, country=country, duration_ms=get_dur())
+        raise HTTPException(status_code=404, detail="Book not found")
+
     async def finalize(data, source):
         data = _init_stats(data)
-        data["custom_metadata"] = await get_custom_fields(asin) or {}
+        data["custom_metadata"] = await custom_task or {}
         await upsert_book_to_db(data)
         await set_cache(cache_key, data)
-        await log_activity("fetch_metadata", asin, details=source, device_id=device_id, country=country, duration_ms=get_dur())
+        log_activity("fetch_metadata", asin, details=source, device_id=device_id, country=country, duration_ms=get_dur())
         return data
 
-    try:
-        raw = await asyncio.to_thread(audible.get_product_raw, asin)
-        data = await compiler.compile_audible_metadata(asin, raw)
-        return await finalize(data, "Audible")
-    except: pass
-
-    if data := await itunes.fetch_details(asin):
-        return await finalize(data, "iTunes")
-            
-    if asin.isdigit() and len(asin) == 13:
-        if data := await prh.fetch_details(asin):
-            return await finalize(data, "PRH")
-
-    await log_activity("fetch_error", asin, details="Not found", device_id=device_id, country=country, duration_ms=get_dur())
+    async def audible_details():
+        raw = await audible_call(audible.get_product_raw, asin)
+        return await compiler.compile_audible_metadata(asin, raw)
+
+    # Audible > iTunes > PRH, but queried together rather than one after another.
+    # iTunes ids are numeric: anything else can only be an Audible ASIN.
+    candidates = [("Audible", audible_details())]
+    if asin.isdigit():
+        candidates.append(("iTunes", itunes.fetch_details(asin)))
+        if len(asin) == 13:
+            candidates.append(("PRH", prh.fetch_details(asin)))
+
+    data, source, clean = await _race_providers(asin, candidates)
+    if data:
+        return await finalize(data, source)
+
+    custom_task.cancel()
+    # Only a definite miss is remembered; a provider error/timeout shouldn't hide the book
+    if clean:
+        _fire(redis_client.set(miss_key, "1", ex=BOOK_MISS_TTL))
+    log_activity("fetch_error", asin, details="Not found", device_id=device_id, country=country, duration_ms=get_dur())
     raise HTTPException(status_code=404, detail="Book not found")
 
 # --- 3. LIST IMPORT ENDPOINT ---
+# --- SHARED: PERSIST LIST BOOKS ---
+_STATS_FIELDS = ("cached_at", "last_accessed", "access_count")
+
+def _same_book(cached: dict, book: dict):
+    """True when the cached copy matches book apart from the stats fields."""
+    if not cached: return False
+    strip = lambda d: {k: v for k, v in d.items() if k not in _STATS_FIELDS}
+    return strip(cached) == strip(book)
+
+async def _store_books(books: list):
+    """Library upsert + cache write for a batch of books, as one bulk_write and one pipeline."""
+    if not books: return
+    await asyncio.gather(
+        bulk_upsert_books(books),
+        set_cache_many({f"book_v7:{b['asin']}": b for b in books})
+    )
+
+async def _fetch_list_book(asin: str, req_id: str, custom_fields: dict, now_iso: str = None):
+    """Fetches one ASIN from Audible; None if it couldn't be fetched."""
+    async def _get_data():
+        raw = await audible_call(audible.get_product_raw, asin)
+        return await compiler.compile_audible_metadata(asin, raw, custom_fields=custom_fields)
+
+    meta = await benchmark_async(req_id, "Audible", _get_data)
+    return _init_stats(meta, now_iso) if meta else None
+
+async def _persist_list_books(asins: list, req_id: str):
+    """
+    Makes sure every ASIN of a list is stored. Cache and library are checked
+    for the whole list up front (one MGET + one $in query); only the ASINs
+    missing from both are fetched from Audible, AUDIBLE_CONCURRENCY at a time,
+    and written back in one batch.
+    Returns how many ASINs are available afterwards.
+    """
+    cached = await get_cache_multi([f"book_v7:{a}" for a in asins])
+    missing = [a for a in asins if cached[f"book_v7:{a}"] is None]
+    stored = await get_stored_asins(missing)
+    to_fetch = [a for a in missing if a not in stored]
+    custom = await get_custom_fields_many(to_fetch)
+    now_iso = datetime.datetime.utcnow().isoformat()
+
+    # The semaphore is the rate limit: a slow fetch only holds its own slot
+    async def _gated(asin):
+        async with _AUDIBLE_SEM:
+            return await _fetch_list_book(asin, req_id, custom.get(asin, {}), now_iso)
+
+    fetched = [b for b in await asyncio.gather(*[_gated(a) for a in to_fetch]) if b]
+    await _store_books(fetched)
+    return len(asins) - len(to_fetch) + len(fetched)
+
 # --- REFACTORED IMPORT LOGIC ---
 async def execute_list_import(url: str, device_id: str, country: str, req_id: str):
     """
     Core logic for importing a list. Can be run synchronously or in background.
     """
-    start_ts = time.time()
+    start_ts = time.perf_counter()
     config = await get_system_settings()
     max_pages = config.get("scrape_limit_pages", 100)
 
     # --- A: GOODREADS ---
     if "goodreads.com" in url:
         try:
-            list_title, books = await benchmark_call(
+            list_title, books = await benchmark_async(
                 req_id, "Goodreads Scraper", goodreads.scrape_list_from_url, url, max_pages=max_pages
             )
         except Exception as e:
-            print(f"❌ Goodreads Import Error: {e}")
+            logger.error(f"❌ Goodreads Import Error: {e}")
             # If running in background, we can't raise HTTPException to user.
             # But for sync calls, we might want to propagate.
             # For now, we'll re-raise if it's a critical logic error, or just log.
@@ -429,73 +648,45 @@ async def execute_list_import(url: str, device_id: str, country: str, req_id: st
 
         if not books: raise Exception("No books found.")
 
-        for book in books:
-            book = _init_stats(book)
-            await upsert_book_to_db(book)
-            await set_cache(f"book_v7:{book['asin']}", book)
+        # Only write books that are new or changed since they were cached
+        cached = await get_cache_multi([f"book_v7:{b['asin']}" for b in books])
+        now_iso = datetime.datetime.utcnow().isoformat()
+        changed = [_init_stats(b, now_iso) for b in books if not _same_book(cached[f"book_v7:{b['asin']}"], b)]
+        await _store_books(changed)
 
         asins = [b['asin'] for b in books]
         await save_imported_list(list_title, url, asins, source="Goodreads")
         
-        duration = (time.time() - start_ts) * 1000
-        await log_activity("import_list", list_title, details=f"GR: {len(books)} items", device_id=device_id, country=country, duration_ms=duration)
+        duration = (time.perf_counter() - start_ts) * 1000
+        log_activity("import_list", list_title, details=f"GR: {len(books)} items", device_id=device_id, country=country, duration_ms=duration)
         return {"status": "success", "title": list_title, "count": len(books)}
 
     # --- B: AUDIBLE ---
     else:
         try:
-            list_title, asins = await benchmark_call(
-                req_id, "Audible Scraper", asyncio.to_thread, audible.scrape_list_from_url, url
+            list_title, asins = await benchmark_async(
+                req_id, "Audible Scraper", audible.scrape_list_from_url, url
             )
         except Exception as e:
-            print(f"❌ Audible Import Error: {e}")
+            logger.error(f"❌ Audible Import Error: {e}")
             raise e
         
         if not asins: raise Exception("No ASINs found.")
         
-        successful_books = []
-
-        async def fetch_and_persist_book(asin):
-            cache_key = f"book_v7:{asin}"
-            if await get_cache(cache_key): return True
-            if await get_book_from_db(asin): return True
-
-            try:
-                async def _get_data():
-                    raw = await asyncio.to_thread(audible.get_product_raw, asin)
-                    return await compiler.compile_audible_metadata(asin, raw)
-
-                meta = await benchmark_call(req_id, "Audible", _get_data)
-                if meta:
-                    meta = _init_stats(meta)
-                    await upsert_book_to_db(meta)
-                    await set_cache(cache_key, meta)
-                    return True
-            except:
-                await log_provider_stats(req_id, "Audible", 0, 0, "error")
-            return False
-
-        chunk_size = 10
-        for i in range(0, len(asins), chunk_size):
-            chunk = asins[i:i + chunk_size]
-            tasks = [fetch_and_persist_book(asin) for asin in chunk]
-            results = await asyncio.gather(*tasks)
-            for res in results:
-                if res: successful_books.append(1)
-            await asyncio.sleep(0.2)
+        imported = await _persist_list_books(asins, req_id)
 
         await save_imported_list(list_title, url, asins, source="Audible")
         
-        duration = (time.time() - start_ts) * 1000
-        await log_activity("import_list", list_title, details=f"Items: {len(successful_books)}/{len(asins)}", device_id=device_id, country=country, duration_ms=duration)
+        duration = (time.perf_counter() - start_ts) * 1000
+        log_activity("import_list", list_title, details=f"Items: {imported}/{len(asins)}", device_id=device_id, country=country, duration_ms=duration)
         
-        return {"status": "success", "title": list_title, "count": len(asins), "imported": len(successful_books)}
+        return {"status": "success", "title": list_title, "count": len(asins), "imported": imported}
 
 # --- 3. LIST IMPORT ENDPOINT (SYNC) ---
 @router.post("/lists/import")
 async def import_audible_list(data: ImportListRequest, request: Request):
     device_id, country = await process_client_info(request)
-    req_id = str(uuid.uuid4())
+    req_id = secrets.token_hex(8)
     
     try:
         return await execute_list_import(data.url, device_id, country, req_id)
@@ -515,15 +706,15 @@ async def import_audible_list_async(data: ImportListRequest, request: Request, b
 
     # 2. Prepare Context
     device_id, country = await process_client_info(request)
-    req_id = str(uuid.uuid4())
+    req_id = secrets.token_hex(8)
 
     # 3. Wrapper to handle background exceptions safely
     async def safe_import_task(url, dev_id, ctry, rid):
         try:
             await execute_list_import(url, dev_id, ctry, rid)
         except Exception as e:
-            print(f"❌ Background Import Failed for {url}: {e}")
-            await log_activity("import_error", url, details=str(e), device_id=dev_id, country=ctry)
+            logger.error(f"❌ Background Import Failed for {url}: {e}")
+            log_activity("import_error", url, details=str(e), device_id=dev_id, country=ctry)
 
     # 4. Enqueue Task
     background_tasks.add_task(safe_import_task, data.url, device_id, country, req_id)
@@ -587,45 +778,40 @@ async def get_list_items(
     end = start + limit
     page_asins = all_asins[start:end]
     
-    # 3. Fetch Metadata
+    # 3. Fetch Metadata: one MGET for the page, one $in query for the misses
+    # (projected to the response fields, so those partial docs aren't re-cached)
     items = []
-    req_id = str(uuid.uuid4()) # For internal logging if needed
-    
-    async def fetch_item(asin):
-        # Try Cache/DB first
-        cache_key = f"book_v7:{asin}"
-        if cached := await get_cache(cache_key): return cached
-        if stored := await get_book_from_db(asin): 
-             await set_cache(cache_key, stored)
-             return stored
-             
-        # If not found, try to fetch live (optional, might be slow for lists)
-        # For now, we'll just return basic info if missing
-        return {"asin": asin, "title": "Unknown Title", "authors": []}
-
-    # Fetch in parallel
-    tasks = [fetch_item(asin) for asin in page_asins]
-    results = await asyncio.gather(*tasks)
+    cached = await get_cache_multi([f"book_v7:{a}" for a in page_asins])
+    misses = [a for a in page_asins if cached[f"book_v7:{a}"] is None]
+    model = ListItemEnhanced if enhanced else ListItemDefault
+    stored = await get_books_from_db_many(misses, fields=tuple(model.model_fields))
+
+    # Not found anywhere: basic info only (live fetches would be too slow for lists)
+    results = [
+        cached[f"book_v7:{a}"] or stored.get(a) or {"asin": a, "title": "Unknown Title", "authors": []}
+        for a in page_asins
+    ]
     
-    # 4. Map to Model
+    # 4. Map to Model. model_construct skips per-item validation: these rows
+    # are our own stored data, and response_model validates the result once.
     for data in results:
         base_info = {
             "asin": data.get("asin", "Unknown"),
             "title": data.get("title", "Unknown"),
-            "authors": data.get("authors", [])
+            "authors": data.get("authors") or []
         }
         
         if enhanced:
-            items.append(ListItemEnhanced(
+            items.append(ListItemEnhanced.model_construct(
                 **base_info,
-                genres=data.get("genres", []),
+                genres=data.get("genres") or [],
                 cover_image=data.get("cover_image"),
                 rating=data.get("rating")
             ))
         else:
-            items.append(ListItemDefault(**base_info))
+            items.append(ListItemDefault.model_construct(**base_info))
             
-    return ListItemsResponse(
+    return ListItemsResponse.model_construct(
         items=items,
         total_count=total_count,
         page=page,
@@ -635,45 +821,20 @@ async def get_list_items(
 # --- 4. CREATE MANUAL LIST ---
 @router.post("/lists/create")
 async def create_manual_list(data: CreateListRequest, request: Request):
-    start_ts = time.time()
+    start_ts = time.perf_counter()
     device_id, country = await process_client_info(request)
-    req_id = str(uuid.uuid4())
+    req_id = secrets.token_hex(8)
     
-    clean_asins = list(set([a.strip() for a in data.asins if a and a.strip()]))
+    # Ordered dedup: keeps the ASINs in the order the user gave them
+    clean_asins = list(dict.fromkeys(s for s in (a.strip() for a in data.asins if a) if s))
     if not clean_asins: raise HTTPException(status_code=400, detail="No valid ASINs provided")
 
     await create_custom_list(data.name, clean_asins)
     
-    successful_count = 0
+    successful_count = await _persist_list_books(clean_asins, req_id)
 
-    async def fetch_and_persist_book(asin):
-        cache_key = f"book_v7:{asin}"
-        if await get_cache(cache_key): return True
-        if await get_book_from_db(asin): return True
-        
-        try:
-            async def _get_data():
-                raw = await asyncio.to_thread(audible.get_product_raw, asin)
-                return await compiler.compile_audible_metadata(asin, raw)
-            
-            meta = await benchmark_call(req_id, "Audible", _get_data)
-            if meta: 
-                meta = _init_stats(meta)
-                await upsert_book_to_db(meta)
-                await set_cache(cache_key, meta)
-                return True
-        except: pass
-        return False
-
-    for i in range(0, len(clean_asins), 10):
-        chunk = clean_asins[i:i + 10]
-        results = await asyncio.gather(*[fetch_and_persist_book(a) for a in chunk])
-        for res in results:
-            if res: successful_count += 1
-        await asyncio.sleep(0.1)
-
-    duration = (time.time() - start_ts) * 1000
-    await log_activity("create_list", data.name, details=f"Items: {successful_count}", device_id=device_id, country=country, duration_ms=duration)
+    duration = (time.perf_counter() - start_ts) * 1000
+    log_activity("create_list", data.name, details=f"Items: {successful_count}", device_id=device_id, country=country, duration_ms=duration)
     return {"status": "success", "name": data.name, "count": len(clean_asins)}
 
 # --- 5. CUSTOM FIELDS ---
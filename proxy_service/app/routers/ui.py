@@ -1,11 +1,14 @@
+import os
+import datetime
 from typing import Optional # <--- FIXED: Added this import
 from urllib.parse import urlencode
+import jinja2
 from fastapi import APIRouter, Request, Form, Depends, HTTPException, status, Response
 from fastapi.responses import RedirectResponse, HTMLResponse
 from fastapi.templating import Jinja2Templates
 
 # Auth Logic
-from app.auth import verify_password, create_access_token, get_current_user, ADMIN_USERNAME, get_active_password_hash, get_password_hash
+from app.auth import verify_password, create_access_token, get_current_user, ADMIN_USERNAME, get_active_password_hash, get_password_hash, invalidate_active_password_hash
 from app.database import (
     set_stored_password_hash, 
     get_dashboard_stats, 
@@ -23,12 +26,21 @@ from app.database import (
     delete_book_from_library,
     get_book_from_db,
     get_cache,
+    get_cache_multi,
     set_cache
 )
 from app.limiter import limiter
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
+# Templates only change with a deploy: skip Jinja's per-render mtime check
+# (TEMPLATES_AUTO_RELOAD=1 for development) and keep compiled bytecode on disk
+templates = Jinja2Templates(env=jinja2.Environment(
+    loader=jinja2.FileSystemLoader("templates"),
+    autoescape=jinja2.select_autoescape(),
+    auto_reload=os.getenv("TEMPLATES_AUTO_RELOAD") == "1",
+    cache_size=400,
+    bytecode_cache=jinja2.FileSystemBytecodeCache(),
+))
 
 # --- AUTH HELPER ---
 async def check_ui_auth(request: Request):
@@ -69,8 +81,9 @@ async def setup_action(
         return templates.TemplateResponse("setup.html", {"request": request, "error": "Password must be at least 8 characters"})
 
     # Hash and Save
-    pw_hash = get_password_hash(password)
+    pw_hash = await get_password_hash(password)
     await set_stored_password_hash(pw_hash)
+    await invalidate_active_password_hash()
     
     return RedirectResponse(url="/login?setup=success", status_code=303)
 
@@ -92,7 +105,7 @@ async def login(request: Request, response: Response, username: str = Form(...),
     if not active_hash:
         return RedirectResponse(url="/setup", status_code=303)
 
-    if username == ADMIN_USERNAME and verify_password(password, active_hash):
+    if username == ADMIN_USERNAME and await verify_password(password, active_hash):
         # Create Token
         access_token = create_access_token(data={"sub": username})
         # Set Cookie (HttpOnly)
@@ -256,6 +269,13 @@ async def view_details(request: Request):
     stats = await get_detailed_stats()
     return templates.TemplateResponse("details.html", {"request": request, "stats": stats, "active_page": "details"})
 
+def _jsonable(obj):
+    """Copy of obj with every date/datetime as an ISO string (one walk, no JSON round trip)."""
+    if isinstance(obj, dict): return {k: _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, list): return [_jsonable(v) for v in obj]
+    if isinstance(obj, datetime.date): return obj.isoformat()
+    return obj
+
 @router.get("/detail_view")
 async def view_detail_page(request: Request, asin: Optional[str] = None):
     if not await check_ui_auth(request): return RedirectResponse("/login")
@@ -279,18 +299,10 @@ async def view_detail_page(request: Request, asin: Optional[str] = None):
              s = book.get("series", [])
              book['series_str'] = f"{s[0].get('name')} #{s[0].get('sequence')}" if s else "-"
     
-    # Serialize for template
-    import json
-    def json_serial(obj):
-        if isinstance(obj, (datetime.datetime, datetime.date)): return obj.isoformat()
-        raise TypeError(f"Type {type(obj)} not serializable")
-    
-    # Jinja's |tojson filter fails on datetime objects, so we pre-serialize the object used in debug view
-    # But wait, we want to pass the object to template as normal for access {{ book.title }}, 
-    # and ONLY serialize for the {{ book | tojson }} part? 
-    # Actually, converting the whole thing to a dict with strings is safer for both.
+    # Jinja's |tojson filter fails on datetime objects (Mongo copies carry
+    # added_at/updated_at), so dates become ISO strings for the whole object
     if book:
-        book = json.loads(json.dumps(book, default=json_serial))
+        book = _jsonable(book)
 
     return templates.TemplateResponse("detail_view.html", {
         "request": request, 
@@ -311,9 +323,10 @@ async def view_list_detail(request: Request, list_id: str):
     if not list_obj: return RedirectResponse(url="/lists")
     
     books = []
-    for asin in list_obj.get('asins', []):
-        cached = await get_cache(f"book_v7:{asin}")
-        if cached:
+    asins = list_obj.get('asins', [])
+    cached_books = await get_cache_multi([f"book_v7:{asin}" for asin in asins])
+    for asin in asins:
+        if cached := cached_books[f"book_v7:{asin}"]:
             cached['authors_str'] = ", ".join(cached.get("authors", []))
             cached['narrators_str'] = ", ".join(cached.get("narrators", []))
             books.append(cached)
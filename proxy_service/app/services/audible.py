@@ -4,16 +4,35 @@ import audible
 from fastapi import HTTPException
 from app.config import AUDIBLE_AUTH_FILE, RESPONSE_GROUPS
 import httpx
-from bs4 import BeautifulSoup
+import lxml.html
 import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Product links: /pd/Title-Audiobook/B0xxxx or /pd/B0xxxx
+_ASIN_RE = re.compile(r'/pd/.*(B0[A-Z0-9]{8})')
+
+# One signed async client per process: the auth file is parsed once and
+# requests share its keep-alive pool instead of a thread per call
+_client = None
 
 def get_client():
-    if not os.path.exists(AUDIBLE_AUTH_FILE):
-        raise HTTPException(status_code=500, detail="Missing audible_auth.json")
-    auth = audible.Authenticator.from_file(AUDIBLE_AUTH_FILE)
-    return audible.Client(auth)
+    global _client
+    if _client is None:
+        if not os.path.exists(AUDIBLE_AUTH_FILE):
+            raise HTTPException(status_code=500, detail="Missing audible_auth.json")
+        auth = audible.Authenticator.from_file(AUDIBLE_AUTH_FILE)
+        _client = audible.AsyncClient(auth)
+    return _client
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
 
-def search_raw(query: str = None, author: str = None, isbn: str = None, limit: int = 5):
+async def search_raw(query: str = None, author: str = None, isbn: str = None, limit: int = 5):
     """
     Supports General, Author, and ISBN search.
     """
@@ -39,18 +58,18 @@ def search_raw(query: str = None, author: str = None, isbn: str = None, limit: i
         else:
             return []
 
-        results = client.get("catalog/products", params=params)
+        results = await client.get("catalog/products", params=params)
         
         if results and results.get('products'):
             return results['products']
             
     except Exception as e:
-        print(f"❌ Audible Search Error: {e}")
+        logger.error(f"❌ Audible Search Error: {e}")
     return []
 
-def get_product_raw(asin: str):
+async def get_product_raw(asin: str):
     client = get_client()
-    resp = client.get(f"catalog/products/{asin}", params={"response_groups": RESPONSE_GROUPS})
+    resp = await client.get(f"catalog/products/{asin}", params={"response_groups": RESPONSE_GROUPS})
     return resp['product']
 
 
@@ -64,47 +83,45 @@ async def scrape_list_from_url(url: str):
     }
     
     asins = []
+    seen = set()
     title = "Imported List"
     
     try:
         async with httpx.AsyncClient(follow_redirects=True) as client:
             resp = await client.get(url, headers=headers, timeout=15.0)
             if resp.status_code != 200:
-                print(f"❌ Scrape Failed: {resp.status_code}")
+                logger.error(f"❌ Scrape Failed: {resp.status_code}")
                 return None, []
             
-            soup = BeautifulSoup(resp.content, "lxml")
+            tree = lxml.html.fromstring(resp.content)
             
             # 1. Extract Title
-            h1 = soup.find("h1")
-            if h1:
-                title = h1.get_text(strip=True)
+            h1 = tree.find(".//h1")
+            if h1 is not None:
+                title = h1.text_content().strip()
             else:
-                title = soup.title.get_text(strip=True).replace("| Audible.com", "").strip()
+                title = tree.findtext(".//title").strip().replace("| Audible.com", "").strip()
 
             # 2. Extract ASINs
             # Audible lists usually have li items with 'data-asin' attribute
             # Strategy A: data-asin attribute (most reliable on desktop views)
-            elements_with_asin = soup.select("[data-asin]")
-            for el in elements_with_asin:
-                asin = el.get("data-asin")
-                if asin and len(asin) == 10 and asin not in asins:
+            for asin in tree.xpath("//@data-asin", smart_strings=False):
+                if asin and len(asin) == 10 and asin not in seen:
+                    seen.add(asin)
                     asins.append(asin)
             
             # Strategy B: Fallback to regex in links if data-asin missing
             if not asins:
-                links = soup.find_all("a", href=True)
-                for link in links:
-                    href = link['href']
-                    # Match /pd/Title-Audiobook/B0xxxx or /pd/B0xxxx
-                    match = re.search(r'/pd/.*(B0[A-Z0-9]{8})', href)
+                for href in tree.xpath("//a/@href", smart_strings=False):
+                    match = _ASIN_RE.search(href)
                     if match:
                         asin = match.group(1)
-                        if asin not in asins:
+                        if asin not in seen:
+                            seen.add(asin)
                             asins.append(asin)
 
     except Exception as e:
-        print(f"❌ List Scrape Exception: {e}")
+        logger.error(f"❌ List Scrape Exception: {e}")
         return None, []
 
     return title, asins
\ No newline at end of file
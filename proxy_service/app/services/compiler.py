@@ -1,12 +1,27 @@
 import html
+import asyncio
 import httpx
 from app.config import AUDNEXUS_URL
 from app.database import get_custom_fields
 from app.utils import deep_find_rating, deep_find_count, normalize_language
 
+# Pooled, keep-alive client for Audnexus chapter lookups (closed on app shutdown)
+client = httpx.AsyncClient(base_url=AUDNEXUS_URL, timeout=2.0, limits=httpx.Limits(max_keepalive_connections=32, max_connections=64))
 
-async def compile_audible_metadata(asin: str, p: dict):
-    """Converts raw Audible JSON to Standard JSON"""
+
+async def _fetch_chapters(asin: str):
+    """Audnexus chapter list; [] when unavailable (chapters are optional)."""
+    try:
+        r = await client.get(f"/books/{asin}/chapters")
+        if r.status_code == 200: return r.json()
+    except (httpx.HTTPError, ValueError): pass
+    return []
+
+async def compile_audible_metadata(asin: str, p: dict, custom_fields: dict = None):
+    """
+    Converts raw Audible JSON to Standard JSON.
+    Pass custom_fields when the caller already looked them up (batch flows).
+    """
     
     # Series
     series_list = [{"name":s["title"],"sequence":s.get("sequence")} for s in p.get("series",[])]
@@ -21,13 +36,11 @@ async def compile_audible_metadata(asin: str, p: dict):
         if "run_time" in ad: runtime = ad["run_time"]
         elif "length_ms" in ad: runtime = int(ad["length_ms"] / 60000)
     
-    # Chapters (Fetch from Audnexus)
-    chapters = []
-    try:
-        async with httpx.AsyncClient() as h:
-            r = await h.get(f"{AUDNEXUS_URL}/books/{asin}/chapters", timeout=2.0)
-            if r.status_code == 200: chapters = r.json()
-    except: pass
+    # Chapters (Audnexus) and, unless passed in, custom fields (Mongo): independent, so overlapped
+    if custom_fields is None:
+        chapters, custom_fields = await asyncio.gather(_fetch_chapters(asin), get_custom_fields(asin))
+    else:
+        chapters = await _fetch_chapters(asin)
 
     return {
         "asin": asin,
@@ -47,6 +60,6 @@ async def compile_audible_metadata(asin: str, p: dict):
         "cover_image": p.get("product_images", {}).get("500"),
         "sample_url": p.get("sample_url"),
         "chapters": chapters,
-        "custom_metadata": await get_custom_fields(asin) or {},
+        "custom_metadata": custom_fields or {},
         "provider": "Audible"
     }
\ No newline at end of file
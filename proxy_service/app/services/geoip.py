@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# ip-api.com batch endpoint: up to 100 IPs per POST, only the fields we use
+BATCH_URL = "http://ip-api.com/batch?fields=query,countryCode"
+MAX_BATCH = 100
+MAX_WAIT = 0.025 # Seconds to wait for more IPs before sending a batch
+LOOKUP_TIMEOUT = 2.0 # Upper bound on a caller's wait (batch window + HTTP timeout)
+
+# Pooled, keep-alive client for ip-api.com (closed on app shutdown)
+client = httpx.AsyncClient(timeout=1.5, limits=httpx.Limits(max_keepalive_connections=32))
+
+
+class GeoBatcher:
+    """
+    Coalesces concurrent country lookups into ip-api.com /batch calls.
+    lookup() queues the IP and waits; a worker task sends whatever arrived
+    within MAX_WAIT (or MAX_BATCH IPs) as a single request.
+    """
+    def __init__(self, max_batch: int = MAX_BATCH, max_wait: float = MAX_WAIT):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        self.worker = None
+
+    async def lookup(self, ip: str) -> str:
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((ip, future))
+        try:
+            return await asyncio.wait_for(future, LOOKUP_TIMEOUT)
+        except asyncio.TimeoutError:
+            return "Unknown"
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0: break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._resolve(batch)
+            except Exception as e:
+                # Never let one bad batch kill the worker (later lookups would hang)
+                logger.error(f"❌ GeoIP Worker Error: {e}")
+
+    async def _resolve(self, batch: list):
+        ips = list(dict.fromkeys(ip for ip, _ in batch))
+        countries = {}
+        try:
+            resp = await client.post(BATCH_URL, json=[{"query": ip} for ip in ips])
+            if resp.status_code == 200:
+                countries = {r.get("query"): r.get("countryCode") or "Unknown" for r in resp.json()}
+            else:
+                logger.warning(f"⚠️ GeoIP Batch Error: {resp.status_code}")
+        except Exception as e:
+            # Also covers a non-list body (error object) from ip-api
+            logger.warning(f"⚠️ GeoIP Batch Exception: {e}")
+        finally:
+            for ip, future in batch:
+                if not future.done():
+                    future.set_result(countries.get(ip, "Unknown"))
+
+    async def close(self):
+        if self.worker:
+            self.worker.cancel()
+        await client.aclose()
+
+
+batcher = GeoBatcher()
@@ -5,6 +5,9 @@ import httpx
 from bs4 import BeautifulSoup
 from app.utils import normalize_language
 import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
 
 # --- SEARCH SCRAPER (Results Page) ---
 async def search_scraper(query: str):
@@ -31,9 +34,9 @@ async def search_scraper(query: str):
                 try:
                     item = parse_search_row(row)
                     if item: results.append(item)
-                except: continue
+                except Exception: continue
     except Exception as e:
-        print(f"⚠️ Goodreads Scrape Failed: {e}")
+        logger.warning(f"⚠️ Goodreads Scrape Failed: {e}")
         
     return results
 
@@ -104,11 +107,11 @@ async def scrape_list_from_url(url: str, max_pages: int = 200):
     async with httpx.AsyncClient(follow_redirects=True, timeout=30.0) as client:
         while current_url and page_count < max_pages:
             try:
-                print(f"📖 Scraping Page {page_count + 1}: {current_url}")
+                logger.info(f"📖 Scraping Page {page_count + 1}: {current_url}")
                 resp = await client.get(current_url, headers=headers)
                 
                 if resp.status_code != 200: 
-                    print(f"❌ Status {resp.status_code} on page {page_count+1}")
+                    logger.error(f"❌ Status {resp.status_code} on page {page_count+1}")
                     break
                 
                 soup = BeautifulSoup(resp.content, "lxml")
@@ -143,14 +146,14 @@ async def scrape_list_from_url(url: str, max_pages: int = 200):
                     # --- ADD DELAY HERE ---
                     # Random sleep between 1 and 3 seconds to be polite
                     delay = random.uniform(1.0, 3.0)
-                    print(f"   zzz Sleeping {delay:.2f}s...")
+                    logger.info(f"   zzz Sleeping {delay:.2f}s...")
                     await asyncio.sleep(delay)
                     # ----------------------
                     
                 else: 
                     break
             except Exception as e:
-                print(f"❌ Error scraping page {page_count}: {e}")
+                logger.error(f"❌ Error scraping page {page_count}: {e}")
                 break
                 
     return list_title, all_books
@@ -203,7 +206,7 @@ def parse_list_row(row):
             "custom_metadata": {},
             "provider": "Goodreads"
         }
-    except: return None
+    except Exception: return None
 
 # --- HELPER: COVER URL CLEANER ---
 def clean_goodreads_cover_url(src: str) -> str:
@@ -234,7 +237,7 @@ def parse_goodreads_page(html_content, url):
     script = soup.find("script", {"type": "application/ld+json"})
     if script:
         try: data = json.loads(script.string)
-        except: pass
+        except (TypeError, ValueError): pass
     
     # --- EXTRACT GENRES (The Fix) ---
     genres = []
@@ -1,8 +1,14 @@
 import httpx
 import urllib.parse
+import logging
+
+logger = logging.getLogger(__name__)
 
 GOOGLE_BOOKS_API_URL = "https://www.googleapis.com/books/v1/volumes"
 
+# Pooled, keep-alive client shared by all requests (closed on app shutdown)
+client = httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=16))
+
 def _parse_google_book(item):
     """
     Parses a single Google Book item into our internal format.
@@ -60,26 +66,25 @@ async def search_book(query: str, api_key: str, limit: int = 5):
         "printType": "books" # Focus on books
     }
     
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.get(GOOGLE_BOOKS_API_URL, params=params, timeout=10.0)
-            if resp.status_code != 200:
-                print(f"❌ Google Books API Error: {resp.status_code} - {resp.text}")
-                return []
-            
-            data = resp.json()
-            items = data.get("items", [])
-            
-            results = []
-            for item in items:
-                parsed = _parse_google_book(item)
-                if parsed:
-                    results.append(parsed)
-            return results
-            
-        except Exception as e:
-            print(f"❌ Google Books Search Exception: {e}")
+    try:
+        resp = await client.get(GOOGLE_BOOKS_API_URL, params=params, timeout=10.0)
+        if resp.status_code != 200:
+            logger.error(f"❌ Google Books API Error: {resp.status_code} - {resp.text}")
             return []
+        
+        data = resp.json()
+        items = data.get("items", [])
+        
+        results = []
+        for item in items:
+            parsed = _parse_google_book(item)
+            if parsed:
+                results.append(parsed)
+        return results
+        
+    except Exception as e:
+        logger.error(f"❌ Google Books Search Exception: {e}")
+        return []
 
 async def get_book_details(volume_id: str, api_key: str):
     """
@@ -91,15 +96,14 @@ async def get_book_details(volume_id: str, api_key: str):
     url = f"{GOOGLE_BOOKS_API_URL}/{volume_id}"
     params = {"key": api_key}
     
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.get(url, params=params, timeout=10.0)
-            if resp.status_code != 200:
-                return None
-            
-            data = resp.json()
-            return _parse_google_book(data)
-            
-        except Exception as e:
-            print(f"❌ Google Books Details Exception: {e}")
+    try:
+        resp = await client.get(url, params=params, timeout=10.0)
+        if resp.status_code != 200:
             return None
+        
+        data = resp.json()
+        return _parse_google_book(data)
+        
+    except Exception as e:
+        logger.error(f"❌ Google Books Details Exception: {e}")
+        return None
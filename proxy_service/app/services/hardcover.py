@@ -1,8 +1,14 @@
 import httpx
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 HARDCOVER_API_URL = "https://api.hardcover.app/v1/graphql"
 
+# Pooled, keep-alive client shared by all requests (closed on app shutdown)
+client = httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=16))
+
 def _parse_hardcover_book(item):
     """
     Parses a single Hardcover Book item into our internal format.
@@ -95,33 +101,32 @@ async def search_book(query: str, api_key: str, limit: int = 5):
         "limit": limit
     }
     
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.post(
-                HARDCOVER_API_URL, 
-                json={"query": gql_query, "variables": variables}, 
-                headers=headers, 
-                timeout=10.0
-            )
-            
-            if resp.status_code != 200:
-                print(f"❌ Hardcover API Error: {resp.status_code} - {resp.text}")
-                return []
-            
-            data = resp.json()
-            if "errors" in data:
-                print(f"❌ Hardcover GraphQL Error: {data['errors']}")
-                return []
-
-            books = data.get("data", {}).get("books", [])
-            
-            results = []
-            for item in books:
-                parsed = _parse_hardcover_book(item)
-                if parsed:
-                    results.append(parsed)
-            return results
-            
-        except Exception as e:
-            print(f"❌ Hardcover Search Exception: {e}")
+    try:
+        resp = await client.post(
+            HARDCOVER_API_URL, 
+            json={"query": gql_query, "variables": variables}, 
+            headers=headers, 
+            timeout=10.0
+        )
+        
+        if resp.status_code != 200:
+            logger.error(f"❌ Hardcover API Error: {resp.status_code} - {resp.text}")
             return []
+        
+        data = resp.json()
+        if "errors" in data:
+            logger.error(f"❌ Hardcover GraphQL Error: {data['errors']}")
+            return []
+
+        books = data.get("data", {}).get("books", [])
+        
+        results = []
+        for item in books:
+            parsed = _parse_hardcover_book(item)
+            if parsed:
+                results.append(parsed)
+        return results
+        
+    except Exception as e:
+        logger.error(f"❌ Hardcover Search Exception: {e}")
+        return []
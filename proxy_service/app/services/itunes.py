@@ -36,16 +36,15 @@ async def search_raw(query: str = None, author: str = None, isbn: str = None, li
 
 
 async def fetch_details(itunes_id: str):
+    """None when iTunes has no such id; HTTP/transport errors raise (callers tell a miss from a failure)."""
     url = "https://itunes.apple.com/lookup"
     params = {"id": itunes_id}
-    try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, params=params, timeout=5.0)
-            if resp.status_code == 200:
-                data = resp.json()
-                if data["resultCount"] > 0:
-                    return format_result(data["results"][0])
-    except Exception: pass
+    async with httpx.AsyncClient() as client:
+        resp = await client.get(url, params=params, timeout=5.0)
+        resp.raise_for_status()
+        data = resp.json()
+        if data["resultCount"] > 0:
+            return format_result(data["results"][0])
     return None
 
 def format_result(item):
@@ -6,8 +6,6 @@ import asyncio
 from app.database import get_system_settings
 from app.utils import normalize_language
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Base URL for the Enhanced API (V2)
@@ -173,6 +171,8 @@ async def fetch_work_audiobooks(client, work_id, api_key):
 async def fetch_details(isbn: str):
     """
     Lookup specific ISBN using the direct /titles/{isbn} endpoint.
+    None when PRH doesn't know the ISBN (or no API key is set); HTTP/transport
+    errors raise so callers can tell a miss from a failure.
     """
     url = f"{BASE_URL}/titles/{isbn}"
     
@@ -182,18 +182,17 @@ async def fetch_details(isbn: str):
 
     params = {"api_key": api_key}
 
-    try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, params=params, timeout=10.0)
-            
-            if resp.status_code == 200:
-                data = resp.json()
-                if "data" in data and "titles" in data["data"]:
-                    items = data["data"]["titles"]
-                    if items: return format_prh_result(items[0])
-                elif "data" in data and "isbn" in data["data"]:
-                     return format_prh_result(data["data"])
-    except: pass
+    async with httpx.AsyncClient() as client:
+        resp = await client.get(url, params=params, timeout=10.0)
+    if resp.status_code == 404: return None # Unknown ISBN
+    resp.raise_for_status()
+
+    data = resp.json()
+    if "data" in data and "titles" in data["data"]:
+        items = data["data"]["titles"]
+        if items: return format_prh_result(items[0])
+    elif "data" in data and "isbn" in data["data"]:
+         return format_prh_result(data["data"])
     return None
 
 def is_audiobook(item):
@@ -266,7 +265,7 @@ def format_prh_result(item):
             runtime = int(item.get("projectedMinutes"))
         elif item.get("pages"):
             runtime = int(item.get("pages"))
-    except: pass
+    except (TypeError, ValueError): pass
     
     pub_date = item.get("onsale") or item.get("onsaledate")
     if pub_date: pub_date = pub_date[:10]
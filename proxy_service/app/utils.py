@@ -1,4 +1,6 @@
 import os
+import time
+import asyncio
 from collections import deque
 import hashlib
 from app.config import SECRET_KEY
@@ -110,4 +112,30 @@ def get_device_hash(ip: str) -> str:
     
     # Combine IP with Secret Key to prevent rainbow table attacks
     raw = f"{ip}-{SECRET_KEY}"
-    return hashlib.sha256(raw.encode()).hexdigest()[:12]
\ No newline at end of file
+    return hashlib.sha256(raw.encode()).hexdigest()[:12]
+
+
+class TokenBucket:
+    """
+    Async token bucket: allows `rate` acquisitions per second with bursts up to `burst`.
+    acquire() returns immediately while tokens are available and only waits when the
+    caller is actually ahead of the rate (unlike a fixed sleep between batches).
+    """
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                # Holding the lock while waiting keeps callers in FIFO order
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.tokens = 1.0
+                self.updated = time.monotonic()
+            self.tokens -= 1